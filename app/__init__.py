@@ -11,8 +11,12 @@ import os
 db = SQLAlchemy()
 login_manager = LoginManager()
 
-def create_app(config_name=None):
-    """Application factory pattern"""
+def create_app(config_name=None, seed_defaults=True):
+    """
+    Application factory pattern
+    seed_defaults=False skips the development default-song setup (e.g. for ingest pool workers,
+    which would otherwise each commit it to the shared database)
+    """
     from dotenv import load_dotenv
 
     _project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -41,6 +45,15 @@ def create_app(config_name=None):
         from app.config import DevelopmentConfig
         DevelopmentConfig.init_app(app)
     
+    # Spectral engines read their FFT settings from audio.fft_backend
+    from audio import fft_backend
+    fft_backend.configure(
+        app.config['FFT_BACKEND'],
+        app.config['FFT_WORKERS'],
+        app.config['FFT_PRECISION'],
+        app.config['FFT_FAST_LENGTH'],
+    )
+    
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
@@ -77,7 +90,7 @@ def create_app(config_name=None):
             return AdminUser.query.get(pk)
         return User.query.get(int(s, 10))
 
-    if config_name == 'development':
+    if config_name == 'development' and seed_defaults:
         with app.app_context():
             try:
                 from sqlalchemy import inspect
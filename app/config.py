@@ -40,9 +40,71 @@ class Config:
     PERMANENT_SESSION_LIFETIME = timedelta(days=30)
     
     # Audio Processing Configuration
-    AUDIO_SAMPLE_RATE = 44100
+    # Ingest resamples every clip to AUDIO_SAMPLE_RATE (anti-aliased; 0 keeps the source rate) and
+    # downmixes to mono with AUDIO_DOWNMIX: left | right | mix, or keeps two channels with stereo (one
+    # shared ranking; client synthesis and progressive delivery fall back to files for stereo songs).
+    # 22050 halves FFT cost and tier size, and tiers rarely use bins above 11 kHz.
+    # Each song records the rate and downmix it was ingested with.
+    AUDIO_SAMPLE_RATE = int(os.environ.get('AUDIO_SAMPLE_RATE', 44100))
+    AUDIO_DOWNMIX = os.environ.get('AUDIO_DOWNMIX', 'left')
     AUDIO_DURATION = 10  # seconds
     FREQUENCY_LEVELS = [500, 1000, 1500, 2000, 2500, 3500, 5000, 7500]
+    # independent | incremental (low memory) | batched (fastest) - see audio/spectral_layers.py
+    TIER_RECONSTRUCTION_MODE = os.environ.get('TIER_RECONSTRUCTION_MODE', 'batched')
+    # Largest tier kept in each song's spectrum.npz (None = largest FREQUENCY_LEVELS tier);
+    # raise it to allow re-tiering above today's levels without re-downloading
+    SPECTRUM_CACHE_LEVEL = int(os.environ['SPECTRUM_CACHE_LEVEL']) if os.environ.get('SPECTRUM_CACHE_LEVEL') else None
+    # FFT backend for both engines (audio/fft_backend.py): auto picks scipy.fft when installed, else numpy.
+    # scipy is optional and not in requirements.txt; FFT_WORKERS > 1 needs it (a warning is logged
+    # without it). single precision keeps float32/complex64 end to end; fast length
+    # zero-pads each clip to a 2-3-5-smooth transform size and trims tiers back to the clip length
+    FFT_BACKEND = os.environ.get('FFT_BACKEND', 'auto')
+    FFT_WORKERS = int(os.environ.get('FFT_WORKERS', 1))
+    FFT_PRECISION = os.environ.get('FFT_PRECISION', 'single')
+    FFT_FAST_LENGTH = os.environ.get('FFT_FAST_LENGTH', 'True').lower() == 'true'
+    # fft: whole-clip engine (spectral_layers); stft: chunked engine with memory independent of clip
+    # length, but no spectrum.npz (stft_layers); auto: stft for clips longer than STFT_AUTO_SECONDS
+    LAYER_ENGINE = os.environ.get('LAYER_ENGINE', 'fft')
+    STFT_FRAME_SIZE = int(os.environ.get('STFT_FRAME_SIZE', 4096))
+    STFT_AUTO_SECONDS = float(os.environ.get('STFT_AUTO_SECONDS', 30))
+    # Tiers without a WAV on disk are rendered from spectrum.npz on request and kept in an LRU
+    ON_DEMAND_TIERS = os.environ.get('ON_DEMAND_TIERS', 'True').lower() == 'true'
+    PRERENDER_TIER_WAVS = os.environ.get('PRERENDER_TIER_WAVS', 'True').lower() == 'true'
+    TIER_RENDER_CACHE_BYTES = int(os.environ.get('TIER_RENDER_CACHE_BYTES', 64 * 1024 * 1024))
+    # Compressed tier encodings written next to each WAV, in order of preference (see audio/encode.py);
+    # /play_frequency serves the first one the client accepts and falls back to WAV
+    TIER_COMPRESSED_FORMATS = [fmt.strip() for fmt in os.environ.get('TIER_COMPRESSED_FORMATS', 'opus,ogg,flac').split(',') if fmt.strip()]
+    TIER_OPUS_BITRATE = os.environ.get('TIER_OPUS_BITRATE', '48k')
+    # Cache lifetime for content-addressed tier URLs (/tier/<song>/<N>.<digest>.<ext>)
+    TIER_CACHE_MAX_AGE = int(os.environ.get('TIER_CACHE_MAX_AGE', 365 * 24 * 60 * 60))
+    # Also pack each song's tier files into one memory-mapped tiers.pack (see audio/tier_pack.py)
+    PACK_TIERS = os.environ.get('PACK_TIERS', 'False').lower() == 'true'
+    # Progressive delivery: the browser fetches the first tier once, then only the residual each
+    # later tier adds, and sums them itself (needs spectrum.npz; see AudioService.residual_manifest)
+    PROGRESSIVE_TIER_DELIVERY = os.environ.get('PROGRESSIVE_TIER_DELIVERY', 'False').lower() == 'true'
+    PROGRESSIVE_RESIDUAL_FORMAT = os.environ.get('PROGRESSIVE_RESIDUAL_FORMAT', 'flac')
+    # Client synthesis: the browser downloads the ranked coefficients once (/coefficients/...) and
+    # runs the inverse FFT for every tier itself; takes precedence over PROGRESSIVE_TIER_DELIVERY
+    CLIENT_TIER_SYNTHESIS = os.environ.get('CLIENT_TIER_SYNTHESIS', 'False').lower() == 'true'
+    
+    # Source download: fetch only the start_time..end_time window (plus margin seconds) with ffmpeg
+    FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+    DOWNLOAD_SEGMENT_ONLY = os.environ.get('DOWNLOAD_SEGMENT_ONLY', 'True').lower() == 'true'
+    DOWNLOAD_SEGMENT_MARGIN = float(os.environ.get('DOWNLOAD_SEGMENT_MARGIN', 1.0))
+    # Opt-in: whole source tracks kept on disk by Spotify id or search query, so re-ingesting or re-trimming
+    # a song never downloads it again (LRU to DOWNLOAD_CACHE_BYTES, refetched after DOWNLOAD_CACHE_TTL
+    # seconds; 0 bytes, the default, disables the cache). While enabled it takes precedence over
+    # DOWNLOAD_SEGMENT_ONLY: each first fetch downloads the whole track rather than just the window.
+    DOWNLOAD_CACHE_FOLDER = os.environ.get('DOWNLOAD_CACHE_FOLDER', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'audio', 'download_cache'))
+    DOWNLOAD_CACHE_BYTES = int(os.environ.get('DOWNLOAD_CACHE_BYTES', 0))
+    DOWNLOAD_CACHE_TTL = int(os.environ.get('DOWNLOAD_CACHE_TTL', 30 * 24 * 60 * 60))
+    
+    # Background ingest (scripts/ingest_worker.py)
+    INGEST_WORKER_CONCURRENCY = int(os.environ.get('INGEST_WORKER_CONCURRENCY', 2))
+    INGEST_POLL_INTERVAL = float(os.environ.get('INGEST_POLL_INTERVAL', 2.0))  # seconds
+    INGEST_JOB_TIMEOUT = int(os.environ.get('INGEST_JOB_TIMEOUT', 15 * 60))  # seconds
+    # How often each worker fails jobs left running past INGEST_JOB_TIMEOUT by a worker that died
+    INGEST_STALE_CHECK_INTERVAL = float(os.environ.get('INGEST_STALE_CHECK_INTERVAL', 60.0))  # seconds
     
     # Logging Configuration
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
@@ -61,6 +123,19 @@ class Config:
     # If set, the public game uses this Song.base_filename (folder under audio/OutputWAVS)
     # instead of whichever row has is_active=True. None = follow the database.
     FORCED_PLAYBACK_BASE_FILENAME = None
+    # Seconds a worker serves its cached playback song before re-checking the shared version
+    # (app/services/playback_service.py); the worker that changes the song sees it at once
+    ACTIVE_SONG_CHECK_INTERVAL = float(os.environ.get('ACTIVE_SONG_CHECK_INTERVAL', 5))
+    # Same for the song and per-user stats snapshots behind /current_stats (app/services/stats_cache.py);
+    # guesses recorded by other workers show up within this many seconds
+    STATS_CHECK_INTERVAL = float(os.environ.get('STATS_CHECK_INTERVAL', 2))
+    # Most counters (songs plus users) each worker keeps a stats snapshot for; least recently used go first
+    STATS_CACHE_ENTRIES = int(os.environ.get('STATS_CACHE_ENTRIES', 10000))
+    # /stats/stream: each worker checks watched songs' stats every STATS_STREAM_INTERVAL seconds (so at
+    # most 1/interval updates per second reach players) and ends each stream after STATS_STREAM_MAX_SECONDS
+    # (browsers reconnect). Every open stream holds a server thread: run a threaded or gevent server.
+    STATS_STREAM_INTERVAL = float(os.environ.get('STATS_STREAM_INTERVAL', 0.5))
+    STATS_STREAM_MAX_SECONDS = int(os.environ.get('STATS_STREAM_MAX_SECONDS', 300))
     
     @staticmethod
     def init_app(app):
@@ -146,4 +221,5 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
-    FORCED_PLAYBACK_BASE_FILENAME = None 
\ No newline at end of file
+    FORCED_PLAYBACK_BASE_FILENAME = None
+    DOWNLOAD_CACHE_BYTES = 0 
\ No newline at end of file
@@ -5,3 +5,6 @@ Database models for the Audio Frequency Game
 from .user import User, AdminUser, UserPlayerState
 from .song import Song, SongQueue, SongHistory
 from .stats import UserStats, SongStats
+from .ingest import IngestJob
+from .cache import CacheVersion
+from .game import GameState
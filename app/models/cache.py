@@ -0,0 +1,45 @@
+# pyright: reportGeneralTypeIssues=false
+"""
+Cache version counters shared by every worker process
+"""
+
+from app import db
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+
+# INSERT ... ON CONFLICT DO UPDATE for the databases the app runs on
+_UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+class CacheVersion(db.Model):
+    """
+    A named counter bumped whenever the data behind an in-process cache changes
+    Workers compare it with the version their cached copy was built from
+    """
+    __tablename__ = 'cache_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @classmethod
+    def current(cls, name):
+        """Current version of a counter (0 if it was never bumped)"""
+        row = db.session.query(cls.version).filter_by(name=name).first()
+        return row[0] if row else 0
+    
+    @classmethod
+    def bump(cls, name):
+        """
+        Increment a counter (creating it at 1) in one atomic upsert, so concurrent first bumps
+        cannot both insert; runs in the current transaction and the caller commits
+        """
+        insert = _UPSERT_INSERTS[db.session.get_bind().dialect.name]
+        now = datetime.utcnow()
+        statement = insert(cls).values(name=name, version=1, updated_at=now).on_conflict_do_update(
+            index_elements=[cls.name],
+            set_={'version': cls.version + 1, 'updated_at': now}
+        )
+        db.session.execute(statement)
+    
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
@@ -0,0 +1,50 @@
+# pyright: reportGeneralTypeIssues=false
+"""
+Game state model: which song the public game is playing
+"""
+
+from app import db
+from datetime import datetime
+
+class GameState(db.Model):
+    """
+    Single row (id 1) pointing at the active song
+    Activating a song rewrites this one row instead of flagging every song, and version is
+    bumped with each activation so workers can tell their cached playback song is stale
+    """
+    __tablename__ = 'game_state'
+    
+    ROW_ID = 1
+    
+    id = db.Column(db.Integer, primary_key=True)
+    active_song_id = db.Column(db.Integer, db.ForeignKey('songs.id'), nullable=True)
+    activated_at = db.Column(db.DateTime, nullable=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    active_song = db.relationship('Song')
+    
+    @classmethod
+    def current(cls):
+        """The game state row (primary-key read, served from the session once loaded), or None"""
+        return db.session.get(cls, cls.ROW_ID)
+    
+    @classmethod
+    def active_song_id_value(cls):
+        state = cls.current()
+        return state.active_song_id if state else None
+    
+    @classmethod
+    def activate(cls, song_id):
+        """
+        Point the game at song_id (None = no active song) in one atomic update; the caller commits
+        """
+        now = datetime.utcnow()
+        updated = cls.query.filter_by(id=cls.ROW_ID).update(
+            {cls.active_song_id: song_id, cls.activated_at: now, cls.version: cls.version + 1},
+            synchronize_session='fetch'
+        )
+        if not updated:
+            db.session.add(cls(id=cls.ROW_ID, active_song_id=song_id, activated_at=now, version=1))
+    
+    def __repr__(self):
+        return f'<GameState song={self.active_song_id} v{self.version}>'
@@ -0,0 +1,53 @@
+# pyright: reportGeneralTypeIssues=false
+"""
+Ingest job model for background song processing
+"""
+
+from app import db
+from datetime import datetime
+
+class IngestJob(db.Model):
+    """A queued download + DFT run picked up by scripts/ingest_worker.py"""
+    __tablename__ = 'ingest_jobs'
+
+    # queued -> running -> completed | failed; duplicate = dropped in favour of another job
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    artist = db.Column(db.String(200), nullable=False)
+    album = db.Column(db.String(200), nullable=True)
+    week = db.Column(db.Integer, default=1)
+    spotify_id = db.Column(db.String(100), nullable=True)
+    start_time = db.Column(db.Float, default=0.0)
+    end_time = db.Column(db.Float, nullable=True)
+    song_folder_name = db.Column(db.String(200), nullable=False, index=True)
+    status = db.Column(db.String(20), default='queued', index=True)
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    message = db.Column(db.String(255), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    song_id = db.Column(db.Integer, db.ForeignKey('songs.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def is_finished(self):
+        return self.status not in self.ACTIVE_STATUSES
+
+    def to_dict(self):
+        """Status payload for the admin panel"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'artist': self.artist,
+            'status': self.status,
+            'progress': self.progress or 0,
+            'message': self.message,
+            'error': self.error,
+            'song_id': self.song_id,
+            'finished': self.is_finished,
+        }
+
+    def __repr__(self):
+        return f'<IngestJob {self.id} {self.song_folder_name} {self.status}>'
@@ -4,6 +4,7 @@ Song model for the Audio Frequency Game
 """
 
 from app import db
+from app.models.game import GameState
 from datetime import datetime, date, timedelta
 
 class Song(db.Model):
@@ -18,14 +19,26 @@ class Song(db.Model):
     base_filename = db.Column(db.String(200), nullable=False)
     spotify_id = db.Column(db.String(100), nullable=True)
     has_frequency_versions = db.Column(db.Boolean, default=False)
-    is_active = db.Column(db.Boolean, default=False)
+    # How the tiers were ingested (AUDIO_SAMPLE_RATE / AUDIO_DOWNMIX at the time); null for older songs
+    sample_rate = db.Column(db.Integer, nullable=True)
+    downmix = db.Column(db.String(10), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    @property
+    def is_active(self):
+        """Whether this is the game's active song (GameState); change it with PlaybackService.activate"""
+        return self.id is not None and GameState.active_song_id_value() == self.id
+    
     @property
     def available_frequencies(self):
         """Get available frequency versions for this song"""
         from app.services.audio_service import AudioService
         return AudioService.get_available_frequencies(self.base_filename)
+    
+    def tier_sources(self, frequency):
+        """(url, mimetype) per tier format for one frequency version, most preferred first"""
+        from app.services.audio_service import AudioService
+        return AudioService.get_tier_sources(self.base_filename, frequency)
 
 class SongHistory(db.Model):
     """Song history model for tracking all songs that have been played"""
@@ -2,12 +2,18 @@
 Main routes for the game interface
 """
 
-from flask import Blueprint, render_template, request, jsonify, send_file, current_app, redirect, url_for, abort, session
+from flask import Blueprint, render_template, request, jsonify, send_file, current_app, redirect, url_for, abort, session, Response
 from flask_login import current_user, login_required, logout_user, login_user
 from app.models import Song, UserStats, SongStats, User, SongHistory, UserPlayerState
 from app.services import StatsService, AudioService
+from app.services.playback_service import PlaybackService
 from app.services.queue_service import QueueService
+from app.services.stats_stream import get_stats_broadcaster, stream_song_stats
+from app.services.ingest_service import IngestService
+from audio.encode import AUDIO_FORMATS
+import io
 import os
+from werkzeug.datastructures import ContentRange
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
@@ -15,15 +21,8 @@ bp = Blueprint('main', __name__)
 
 
 def _get_playback_song():
-    """Song used for the public game: forced folder (dev) or DB is_active."""
-    forced = current_app.config.get('FORCED_PLAYBACK_BASE_FILENAME')
-    if forced:
-        name = str(forced).strip()
-        if name:
-            song = Song.query.filter_by(base_filename=name).first()
-            if song:
-                return song
-    return Song.query.filter_by(is_active=True).first()
+    """Song used for the public game: forced folder (dev) or DB is_active (cached, see PlaybackService)."""
+    return PlaybackService.get_playback_song()
 
 
 @bp.route('/')
@@ -35,19 +34,11 @@ def index():
     stats = None
     if current_song:
         # Get global song stats for all users
-        song_stats = SongStats.query.filter_by(song_id=current_song.id).first()
-        if song_stats:
-            global_stats = {
-                'average_score': song_stats.average_score,
-                'total_plays': song_stats.total_plays,
-                'total_correct_guesses': song_stats.total_correct_guesses
-            }
-        else:
-            global_stats = {'average_score': 0.0, 'total_plays': 0, 'total_correct_guesses': 0}
+        global_stats = StatsService.get_song_stats(current_song.id)
         
         # Get user-specific stats if logged in
         if current_user.is_authenticated:
-            user_stats = StatsService.get_user_stats(current_user.id, current_song.id)
+            user_stats = StatsService.get_cached_user_stats(current_user.id, current_song.id)
             stats = user_stats
             stats['song_stats'] = global_stats
         else:
@@ -58,37 +49,184 @@ def index():
                 'individual_stats': {'points_distribution': {}, 'max_count': 1}
             }
     
-    return render_template('user.html', current_song=current_song, stats=stats)
+    # Client synthesis and progressive delivery need the song's stored (mono) spectrum;
+    # otherwise each tier is fetched whole
+    tier_delivery = 'files'
+    coefficients_url = None
+    if current_song and AudioService.supports_client_tiers(current_song.base_filename):
+        if current_app.config['CLIENT_TIER_SYNTHESIS']:
+            tier_delivery = 'client'
+            digest, _ = AudioService.coefficient_payload(current_song.base_filename)
+            coefficients_url = url_for('main.coefficient_payload', song_name=current_song.base_filename,
+                                       digest=digest)
+        elif current_app.config['PROGRESSIVE_TIER_DELIVERY']:
+            tier_delivery = 'progressive'
+    
+    return render_template('user.html', current_song=current_song, stats=stats,
+                           tier_delivery=tier_delivery, coefficients_url=coefficients_url)
+
+def _iter_view(view, chunk_size=64 * 1024):
+    # WSGI servers only write bytes, so the mapped slice is copied one chunk at a time as it is sent
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start:start + chunk_size])
+
+def _send_packed(view, mimetype, digest, max_age=None):
+    """Response for a slice of a memory-mapped tiers.pack, with ETag/304 and single-range 206 handling"""
+    response = current_app.response_class(mimetype=mimetype, direct_passthrough=True)
+    response.accept_ranges = 'bytes'
+    if digest:
+        response.set_etag(digest)
+    if max_age:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    
+    total = len(view)
+    start, stop = 0, total
+    # If-Range: only honour the range if the client's copy is this exact version
+    if_range = request.if_range
+    range_allowed = not (if_range.etag or if_range.date) or (digest and if_range.etag == digest)
+    if request.range and range_allowed:
+        span = request.range.range_for_length(total)
+        if span is None:
+            response.status_code = 416
+            response.content_range = ContentRange('bytes', None, None, total)
+            return response
+        start, stop = span
+        response.status_code = 206
+        response.content_range = ContentRange('bytes', start, stop, total)
+    
+    response.response = _iter_view(view[start:stop])
+    response.content_length = stop - start
+    return response.make_conditional(request)
+
+def _send_tier(song_folder, frequency, fmt, source, digest, max_age=None):
+    """
+    Response for one tier (see AudioService.choose_tier_format for source) with a strong ETag
+    when the digest is known; If-None-Match is answered with 304 and Range with 206
+    """
+    if isinstance(source, memoryview):
+        return _send_packed(source, AUDIO_FORMATS[fmt], digest, max_age)
+    
+    etag = digest if digest else True
+    if source:
+        return send_file(source, mimetype=AUDIO_FORMATS[fmt], etag=etag, max_age=max_age)
+    
+    audio_bytes = AudioService.render_tier(song_folder, int(frequency), fmt)
+    if audio_bytes is None:
+        return None
+    return send_file(io.BytesIO(audio_bytes), mimetype=AUDIO_FORMATS[fmt], etag=digest or False,
+                     max_age=max_age)
 
-@bp.route('/play_frequency/<song_name>/<frequency>')
+@bp.route('/play_frequency/<song_name>/<int:frequency>')
 def play_frequency_audio(song_name, frequency):
     """Serve frequency-specific audio files"""
     try:
-        song_folder = os.path.join(current_app.config['AUDIO_OUTPUT_FOLDER'], song_name)
-        
-        if not os.path.exists(song_folder):
-            # Fallback to old mapping system
-            song_folders = {
-                'MrBrightside': 'MrBrighstide',
-                'GhostTown': 'GhostTown',
-                'Milan': 'Milan',
-                'TeenageDirtbag': 'TeenageDirtbag'
-            }
-            
-            folder_name = song_folders.get(song_name)
-            if not folder_name:
-                return 'Song not found', 404
-            song_folder = os.path.join(current_app.config['AUDIO_OUTPUT_FOLDER'], folder_name)
-        
-        filepath = os.path.join(song_folder, f'reconstructed_audio_{frequency}.wav')
-        
-        if os.path.exists(filepath):
-            return send_file(filepath)
-        return 'Frequency version not found', 404
+        # The int converter normalises the level ('0500' is 500); anything else is a 404
+        frequency = str(frequency)
+        song_folder = AudioService.resolve_song_folder(song_name)
+        if not song_folder:
+            return 'Song not found', 404
+        
+        # ?format= or the Accept header picks the encoding
+        fmt, source = AudioService.choose_tier_format(
+            song_folder, frequency, request.args.get('format'), request.accept_mimetypes
+        )
+        if fmt is None:
+            return 'Frequency version not found', 404
+        
+        digest = AudioService.tier_digest(song_folder, frequency, fmt)
+        response = _send_tier(song_folder, frequency, fmt, source, digest)
+        if response is None:
+            return 'Frequency version not found', 404
+        
+        # Not content-addressed, so caches must revalidate (cheap: 304 on a matching ETag)
+        response.cache_control.no_cache = True
+        response.vary.add('Accept')
+        return response
     except Exception as e:
         current_app.logger.error(f"Error in play_frequency_audio: {e}")
         return f'Error: {str(e)}', 500
 
+@bp.route('/tier/<song_name>/<int:frequency>.<digest>.<fmt>')
+def tier_audio(song_name, frequency, digest, fmt):
+    """Serve a tier by content hash; the URL changes whenever the bytes do, so it is cached forever"""
+    try:
+        song_folder = AudioService.resolve_song_folder(song_name)
+        if not song_folder or fmt not in AudioService.tier_formats():
+            return 'Frequency version not found', 404
+        
+        if digest != AudioService.tier_digest(song_folder, str(frequency), fmt):
+            # Stale URL from before a re-ingest
+            return 'Frequency version not found', 404
+        
+        source = AudioService.packed_tier(song_folder, frequency, fmt)
+        if source is None:
+            source = os.path.join(song_folder, f'reconstructed_audio_{frequency}.{fmt}')
+            if not os.path.exists(source):
+                source = None
+        response = _send_tier(song_folder, str(frequency), fmt, source, digest,
+                              max_age=current_app.config['TIER_CACHE_MAX_AGE'])
+        if response is None:
+            return 'Frequency version not found', 404
+        
+        response.cache_control.immutable = True
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error in tier_audio: {e}")
+        return f'Error: {str(e)}', 500
+
+@bp.route('/coefficients/<song_name>.<digest>.bin')
+def coefficient_payload(song_name, digest):
+    """Ranked sparse coefficients for client-side synthesis (see static/js/sparse_synthesis.js)"""
+    try:
+        payload = AudioService.coefficient_payload(song_name)
+        if payload is None or payload[0] != digest:
+            return 'Coefficients not found', 404
+        
+        response = send_file(io.BytesIO(payload[1]), mimetype='application/octet-stream', etag=digest,
+                             max_age=current_app.config['TIER_CACHE_MAX_AGE'])
+        response.cache_control.immutable = True
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error in coefficient_payload: {e}")
+        return f'Error: {str(e)}', 500
+
+@bp.route('/residuals/<song_name>')
+def residual_manifest(song_name):
+    """Manifest for progressive tier delivery (see static/js/progressive_audio.js)"""
+    try:
+        manifest = AudioService.residual_manifest(song_name)
+        if manifest is None:
+            return jsonify({'success': False, 'error': 'Progressive delivery not available for this song'}), 404
+        
+        response = jsonify({'success': True, **manifest})
+        response.set_etag(manifest['version'])
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    except Exception as e:
+        current_app.logger.error(f"Error in residual_manifest: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/residual/<song_name>/<int:level>.<digest>.<fmt>')
+def residual_audio(song_name, level, digest, fmt):
+    """Serve the residual one tier adds to the previous one; content-addressed like /tier"""
+    try:
+        if fmt != current_app.config['PROGRESSIVE_RESIDUAL_FORMAT']:
+            return 'Residual not found', 404
+        audio_bytes = AudioService.render_residual(song_name, level, digest)
+        if audio_bytes is None:
+            return 'Residual not found', 404
+        
+        response = send_file(io.BytesIO(audio_bytes), mimetype=AUDIO_FORMATS[fmt], etag=digest,
+                             max_age=current_app.config['TIER_CACHE_MAX_AGE'])
+        response.cache_control.immutable = True
+        return response
+    except Exception as e:
+        current_app.logger.error(f"Error in residual_audio: {e}")
+        return f'Error: {str(e)}', 500
+
 @bp.route('/submit_guess', methods=['POST'])
 def submit_guess():
     """Handle song guess submission"""
@@ -135,27 +273,36 @@ def submit_guess():
         'already_played': False
     })
 
+def _stats_response(payload, etag, private):
+    """JSON stats response (a 304 if payload is None) that browsers revalidate with If-None-Match on every use"""
+    response = current_app.response_class(status=304) if payload is None else jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+    response.vary.add('Cookie')
+    return response
+
 @bp.route('/current_stats')
 def current_stats():
-    """Get current song statistics"""
+    """
+    Get current song statistics
+    Served from the stats snapshots; a poll whose If-None-Match still matches gets a 304
+    without loading any stats
+    """
     current_song = _get_playback_song()
     if not current_song:
         return jsonify({'error': 'No active song'}), 400
     
+    user_id = current_user.id if current_user.is_authenticated else None
+    etag = StatsService.stats_etag(current_song.id, user_id)
+    if etag in request.if_none_match:
+        return _stats_response(None, etag, private=user_id is not None)
+    
     # Get global song stats for all users
-    song_stats = SongStats.query.filter_by(song_id=current_song.id).first()
-    if song_stats:
-        global_stats = {
-            'average_score': song_stats.average_score,
-            'total_plays': song_stats.total_plays,
-            'total_correct_guesses': song_stats.total_correct_guesses
-        }
-    else:
-        global_stats = {'average_score': 0.0, 'total_plays': 0, 'total_correct_guesses': 0}
+    global_stats = StatsService.get_song_stats(current_song.id)
     
     # If user is not authenticated, return basic song info and global stats only
     if not current_user.is_authenticated:
-        return jsonify({
+        return _stats_response({
             'success': True,
             'song': {
                 'title': current_song.title,
@@ -166,19 +313,34 @@ def current_stats():
                 'song_stats': global_stats,
                 'individual_stats': {'points_distribution': {}, 'max_count': 1}
             }
-        })
+        }, etag, private=False)
     
     # For authenticated users, get full stats
-    stats = StatsService.get_user_stats(current_user.id, current_song.id)
+    stats = StatsService.get_cached_user_stats(current_user.id, current_song.id)
     stats['song_stats'] = global_stats
     
-    return jsonify({
+    return _stats_response({
         'success': True,
         'song': {
             'title': current_song.title,
             'artist': current_song.artist
         },
         'stats': stats
+    }, etag, private=True)
+
+@bp.route('/stats/stream')
+def stats_stream():
+    """Server-sent events with the current song's global stats (see app/services/stats_stream.py)"""
+    current_song = _get_playback_song()
+    if not current_song:
+        return jsonify({'error': 'No active song'}), 400
+    
+    events = stream_song_stats(get_stats_broadcaster(), current_song.id,
+                               StatsService.get_song_stats(current_song.id),
+                               current_app.config['STATS_STREAM_MAX_SECONDS'])
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # nginx must not buffer the stream
     })
 
 @bp.route('/profile')
@@ -248,12 +410,8 @@ def admin_panel():
 @bp.route('/admin/set_active/<int:song_id>', methods=['POST'])
 def set_active(song_id):
     """Set a song as active"""
-    # Set all songs as inactive first
-    Song.query.update({Song.is_active: False})
-    
-    # Set the selected song as active
     song = Song.query.get_or_404(song_id)
-    song.is_active = True
+    PlaybackService.activate(song.id)
     
     from app import db
     db.session.commit()
@@ -365,7 +523,7 @@ def spotify_search():
 
 @bp.route('/admin/process_spotify_song', methods=['POST'])
 def process_spotify_song():
-    """Process a Spotify song and add it to the game"""
+    """Queue a Spotify song for processing and return the job id"""
     try:
         data = request.get_json()
         
@@ -383,11 +541,6 @@ def process_spotify_song():
                 'error': 'Title and artist are required'
             })
         
-        # Create a safe filename for the song
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        safe_artist = "".join(c for c in artist if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        song_folder_name = f"{safe_artist}_{safe_title}".replace(' ', '')
-        
         # Check if song already exists
         existing_song = Song.query.filter_by(title=title, artist=artist).first()
         if existing_song:
@@ -396,56 +549,17 @@ def process_spotify_song():
                 'error': f"Song '{title}' by {artist} already exists in the database"
             })
         
-        # Create output directory
-        output_dir = os.path.join(current_app.config['AUDIO_OUTPUT_FOLDER'], song_folder_name)
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Download audio from YouTube
-        temp_audio_path = os.path.join(output_dir, 'temp_audio.wav')
-        download_success = AudioService.download_from_youtube(
-            title, artist, temp_audio_path, start_time, end_time
-        )
-        
-        if not download_success:
-            return jsonify({
-                'success': False,
-                'error': f"Failed to download audio for '{title}' by {artist}"
-            })
-        
-        # Process through DFT pipeline
-        process_success = AudioService.process_through_dft(
-            temp_audio_path, song_folder_name, f"{safe_title}_{safe_artist}"
+        # Download + DFT run in scripts/ingest_worker.py; the admin panel polls ingest_status
+        job, created = IngestService.enqueue(
+            title, artist, album, week, start_time, end_time, spotify_id
         )
         
-        # Clean up temp file
-        if os.path.exists(temp_audio_path):
-            os.remove(temp_audio_path)
-        
-        if not process_success:
-            return jsonify({
-                'success': False,
-                'error': f"Failed to process audio through DFT pipeline for '{title}' by {artist}"
-            })
-        
-        # Add song to database
-        new_song = Song(
-            title=title, # type: ignore
-            artist=artist, # type: ignore
-            album=album, # type: ignore
-            week=week, # type: ignore
-            base_filename=song_folder_name, # type: ignore
-            spotify_id=spotify_id, # type: ignore
-            has_frequency_versions=True, # type: ignore
-            is_active=False  # Don't make it active by default # type: ignore
-        )
-        
-        from app import db
-        db.session.add(new_song)
-        db.session.commit()
-        
         return jsonify({
             'success': True,
-            'message': f"Successfully processed '{title}' by {artist}. Song added to database with ID: {new_song.id}"
+            'job_id': job.id,
+            'status': job.status,
+            'message': (f"Queued '{title}' by {artist} for processing" if created
+                        else f"'{title}' by {artist} is already being processed")
         })
         
     except Exception as e:
@@ -455,6 +569,15 @@ def process_spotify_song():
             'error': f"Processing failed: {str(e)}"
         })
 
+@bp.route('/admin/ingest_status/<int:job_id>')
+def ingest_status(job_id):
+    """Progress of a background song processing job"""
+    job = IngestService.get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    return jsonify({'success': True, 'job': job.to_dict()})
+
 @bp.route('/admin/delete/<int:song_id>', methods=['DELETE'])
 def delete_song(song_id):
     """Delete a song from the database"""
@@ -465,6 +588,9 @@ def delete_song(song_id):
         from app.models.song import SongQueue
         SongQueue.query.filter_by(song_id=song_id).delete()
         
+        if song.is_active:
+            PlaybackService.activate(None)
+        
         # Delete the song
         from app import db
         db.session.delete(song)
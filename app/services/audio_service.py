@@ -8,20 +8,32 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-import numpy as np
+import soundfile as sf
 import tempfile
-from pydub import AudioSegment
 import yt_dlp
 import glob
-from flask import current_app
+from flask import current_app, url_for
+from audio.spectrum_store import spectrum_path
+from audio.tier_manifest import (
+    derived_digest, file_digest, load_manifest, manifest_levels, tier_entry, tier_key, update_manifest
+)
+from audio.tier_pack import open_pack, remove_pack, write_pack
+
+# (AUDIO_OUTPUT_FOLDER, song name) -> resolved song folder
+_resolved_folders = {}
 
 class AudioService:
     """Service for audio processing and management"""
     
     @staticmethod
-    def get_available_frequencies(song_name):
-        """Get available frequency levels for a song"""
-        song_folder = os.path.join(current_app.config['AUDIO_OUTPUT_FOLDER'], song_name)
+    def resolve_song_folder(song_name):
+        """Output folder for a song, following the legacy name mapping; None if there is none"""
+        output_root = current_app.config['AUDIO_OUTPUT_FOLDER']
+        cached = _resolved_folders.get((output_root, song_name))
+        if cached:
+            return cached
+        
+        song_folder = os.path.join(output_root, song_name)
         
         if not os.path.exists(song_folder):
             # Fallback to old mapping system
@@ -34,70 +46,381 @@ class AudioService:
             
             folder_name = song_folders.get(song_name)
             if not folder_name:
-                return []
-            song_folder = os.path.join(current_app.config['AUDIO_OUTPUT_FOLDER'], folder_name)
+                return None
+            song_folder = os.path.join(output_root, folder_name)
+            if not os.path.exists(song_folder):
+                return None
+        
+        # Only hits are remembered, so a song ingested later is still found
+        _resolved_folders[(output_root, song_name)] = song_folder
+        return song_folder
+    
+    @staticmethod
+    def get_available_frequencies(song_name):
+        """
+        Get available frequency levels for a song, from its tier manifest (no directory listing)
+        Songs ingested before manifests fall back to scanning the folder
+        """
+        song_folder = AudioService.resolve_song_folder(song_name)
+        manifest = load_manifest(song_folder) if song_folder else {}
         
-        available_frequencies = []
-        if os.path.exists(song_folder):
+        available_frequencies = set()
+        if manifest and not manifest.get('legacy'):
+            available_frequencies.update(str(level) for level in manifest_levels(manifest))
+            # Configured levels can be rendered on demand from the stored spectrum
+            if current_app.config['ON_DEMAND_TIERS'] and manifest.get('spectrum'):
+                available_frequencies.update(str(level) for level in current_app.config['FREQUENCY_LEVELS'])
+        elif song_folder:
             for file in os.listdir(song_folder):
                 if file.startswith('reconstructed_audio_') and file.endswith('.wav'):
                     freq = file.replace('reconstructed_audio_', '').replace('.wav', '')
-                    available_frequencies.append(freq)
+                    available_frequencies.add(freq)
+        
+            pack = open_pack(song_folder)
+            if pack:
+                available_frequencies.update(str(level) for level in pack.levels())
+        
+            # Configured levels can be rendered on demand from the stored spectrum
+            if current_app.config['ON_DEMAND_TIERS'] and os.path.exists(spectrum_path(song_folder)):
+                available_frequencies.update(str(level) for level in current_app.config['FREQUENCY_LEVELS'])
         
         # Sort frequencies numerically
         return sorted(available_frequencies, key=int)
     
     @staticmethod
-    def download_from_youtube(song_title, artist, output_path, start_time=0, end_time=None):
-        """Download audio from YouTube"""
+    def tier_formats():
+        """Tier file formats in order of preference: TIER_COMPRESSED_FORMATS, then the WAV fallback"""
+        formats = [fmt for fmt in current_app.config['TIER_COMPRESSED_FORMATS'] if fmt != 'wav']
+        return formats + ['wav']
+    
+    @staticmethod
+    def tier_digest(song_folder, frequency, fmt):
+        """
+        Content digest for one tier file, from the song's tier manifest (or, for songs without
+        a complete manifest, the pack index)
+        Tiers that are only rendered on demand get a digest derived from the spectrum's.
+        Returns None when neither is known (e.g. songs ingested before hashes were written).
+        """
+        manifest = load_manifest(song_folder)
+        entry = manifest['tiers'].get(tier_key(frequency, fmt)) if manifest else None
+        if entry:
+            return entry['digest']
+        
+        pack = open_pack(song_folder)
+        entry = pack.entry(frequency, fmt) if pack and (not manifest or manifest.get('legacy')) else None
+        if entry:
+            return entry[2]
+        
+        if manifest.get('spectrum') and AudioService.can_render_tier(song_folder, frequency, manifest):
+            return derived_digest(manifest['spectrum'], frequency, fmt, AudioService.render_settings(fmt))
+        return None
+    
+    @staticmethod
+    def packed_tier(song_folder, frequency, fmt, manifest=None):
+        """
+        Zero-copy memoryview of a tier in the song's tiers.pack, or None
+        A packed tier is only served when its digest matches the manifest's, so a pack left from
+        before the tiers were rewritten can never shadow the current files
+        """
+        pack = open_pack(song_folder)
+        entry = pack.entry(frequency, fmt) if pack else None
+        if entry is None:
+            return None
+        if manifest is None:
+            manifest = load_manifest(song_folder)
+        expected = manifest['tiers'].get(tier_key(frequency, fmt)) if manifest else None
+        if expected:
+            current = expected['digest'] == entry[2]
+        else:
+            # Songs without a manifest, or with a legacy one that may not list every tier
+            current = not manifest or manifest.get('legacy')
+        return pack.get(frequency, fmt) if current else None
+    
+    @staticmethod
+    def refresh_pack(song_folder):
+        """
+        Call after a song's tier files change: rebuild its tiers.pack when PACK_TIERS is on,
+        otherwise (or when no tier files are left) delete any pack left from earlier
+        """
+        if not (current_app.config['PACK_TIERS'] and write_pack(song_folder)):
+            remove_pack(song_folder)
+    
+    @staticmethod
+    def _remove_tier_files(song_folder):
+        """Delete every reconstructed_audio_<N>.<ext> tier file, its manifest entry and the tiers.pack"""
+        from audio.encode import AUDIO_FORMATS
+        
+        removed = []
+        for name in os.listdir(song_folder):
+            level, _, fmt = name[len('reconstructed_audio_'):].rpartition('.')
+            if name.startswith('reconstructed_audio_') and fmt in AUDIO_FORMATS:
+                os.remove(os.path.join(song_folder, name))
+                removed.append(tier_key(level, fmt))
+        update_manifest(song_folder, remove_tiers=removed)
+        AudioService.refresh_pack(song_folder)
+    
+    @staticmethod
+    def render_settings(fmt):
+        """Settings that change the bytes of a tier rendered on demand as fmt (see derived_digest)"""
+        from audio import fft_backend
+        
+        fft = fft_backend.settings()
+        settings = [fft['backend'], fft['precision'], fft['fast_length']]
+        if fmt == 'opus':
+            settings.append(current_app.config['TIER_OPUS_BITRATE'])
+        return settings
+    
+    @staticmethod
+    def can_render_tier(song_folder, frequency, manifest=None):
+        """
+        Whether a tier may be rendered on demand from the song's spectrum.npz: only configured
+        FREQUENCY_LEVELS and levels recorded in the tier manifest, so arbitrary URLs cannot
+        trigger renders (or fill the render cache)
+        """
+        if not current_app.config['ON_DEMAND_TIERS'] or not str(frequency).isdigit():
+            return False
+        level = int(frequency)
+        if manifest is None:
+            manifest = load_manifest(song_folder)
+        if level not in current_app.config['FREQUENCY_LEVELS'] and level not in manifest_levels(manifest or {}):
+            return False
+        return os.path.exists(spectrum_path(song_folder))
+    
+    @staticmethod
+    def get_tier_sources(song_name, frequency):
+        """
+        (url, mimetype) for each tier format in preference order, for <source> tags
+        Content-addressed (immutable) URLs where the digest is known, otherwise the negotiating URL
+        """
+        from audio.encode import AUDIO_FORMATS
+        
+        song_folder = AudioService.resolve_song_folder(song_name)
+        sources = []
+        for fmt in AudioService.tier_formats():
+            digest = AudioService.tier_digest(song_folder, frequency, fmt) if song_folder else None
+            if digest:
+                url = url_for('main.tier_audio', song_name=song_name, frequency=frequency,
+                              digest=digest, fmt=fmt)
+            else:
+                url = url_for('main.play_frequency_audio', song_name=song_name, frequency=frequency, format=fmt)
+            sources.append((url, AUDIO_FORMATS[fmt]))
+        return sources
+    
+    @staticmethod
+    def choose_tier_format(song_folder, frequency, requested=None, accept_mimetypes=None):
+        """
+        Pick the format to serve for one tier; returns (format, source), where source is a
+        memoryview into the song's tiers.pack, a file path, or None to render on demand.
+        An explicit requested format wins when it can be served; otherwise the smallest format
+        the Accept header allows, falling back to WAV. Returns (None, None) if the tier does not exist.
+        """
+        from audio.encode import AUDIO_FORMATS
+        
+        formats = AudioService.tier_formats()
+        on_disk = {}
+        manifest = load_manifest(song_folder)
+        for fmt in formats:
+            packed = AudioService.packed_tier(song_folder, frequency, fmt, manifest)
+            if packed is not None:
+                on_disk[fmt] = packed
+                continue
+            path = os.path.join(song_folder, f'reconstructed_audio_{frequency}.{fmt}')
+            if os.path.exists(path):
+                on_disk[fmt] = path
+        
+        renderable = AudioService.can_render_tier(song_folder, frequency)
+        candidates = formats if renderable else [fmt for fmt in formats if fmt in on_disk]
+        if not candidates:
+            return None, None
+        
+        if requested in candidates:
+            return requested, on_disk.get(requested)
+        
+        def quality(fmt):
+            if not accept_mimetypes:
+                return 1
+            return accept_mimetypes.quality(AUDIO_FORMATS[fmt].split(';')[0])
+        
+        def rank(fmt):
+            # Highest quality first, then the smallest file already on disk, then preference order
+            if fmt not in on_disk:
+                size = float('inf')
+            elif isinstance(on_disk[fmt], memoryview):
+                size = len(on_disk[fmt])
+            else:
+                size = os.path.getsize(on_disk[fmt])
+            return (-quality(fmt), size, candidates.index(fmt))
+        
+        accepted = [fmt for fmt in candidates if quality(fmt) > 0]
+        if accepted:
+            chosen = min(accepted, key=rank)
+        else:
+            chosen = 'wav' if 'wav' in candidates else candidates[0]
+        return chosen, on_disk.get(chosen)
+    
+    @staticmethod
+    def render_tier(song_folder, level, fmt='wav'):
+        """
+        Render one tier from a song folder's spectrum.npz as encoded bytes, through the render cache
+        Returns None if the folder has no stored spectrum
+        """
+        from audio.encode import encode_audio
+        from audio.spectral_layers import render_ranked_tiers
+        from audio.spectrum_store import load_spectrum
+        from app.services.render_cache import get_render_cache
+        
         try:
-            search_query = f"{song_title} {artist} audio"
-            
-            # Create temp file template
-            with tempfile.NamedTemporaryFile(suffix='', delete=False) as temp_audio_file:
-                temp_audio_path_base = temp_audio_file.name
-            temp_audio_tmpl = temp_audio_path_base + ".%(ext)s"
-            
-            # yt-dlp options
-            ydl_opts = {
-                'format': 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio',
-                'outtmpl': temp_audio_tmpl,
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False,
-                'postprocessors': [],
-            }
+            artifact_mtime = os.stat(spectrum_path(song_folder)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        
+        opus_bitrate = current_app.config['TIER_OPUS_BITRATE']
+        ffmpeg = current_app.config['FFMPEG_BINARY']
+        
+        def render():
+            stored = load_spectrum(song_folder)
+            _, _, audio = next(render_ranked_tiers(stored.bins, stored.values, stored.n, [level],
+                                                    length=stored.length))
+            return encode_audio(audio.T, stored.sample_rate, fmt, opus_bitrate, ffmpeg)
+        
+        # The artifact's mtime is part of the key, so re-ingesting a song never serves stale audio
+        key = (os.path.abspath(song_folder), artifact_mtime, level, fmt)
+        return get_render_cache().get_or_render(key, render)
+    
+    @staticmethod
+    def _resolve_youtube_stream(search_query):
+        """Find the best audio stream for a search; returns (media_url, http_headers) without downloading"""
+        ydl_opts = {
+            'format': 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio',
+            'quiet': True,
+            'no_warnings': True,
+        }
+        
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            search_results = ydl.extract_info(f"ytsearch1:{search_query}", download=False)
+            if not search_results or 'entries' not in search_results or not search_results['entries']:
+                raise Exception(f"No YouTube videos found for: {search_query}")
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            video_info = search_results['entries'][0]
+            return video_info['url'], video_info.get('http_headers') or {}
+    
+    @staticmethod
+    def _download_full_track(search_query, source=None):
+        """Download a whole best-audio stream with yt-dlp; returns (path, files to delete afterwards)"""
+        # Create temp file template
+        with tempfile.NamedTemporaryFile(suffix='', delete=False) as temp_audio_file:
+            temp_audio_path_base = temp_audio_file.name
+        temp_audio_tmpl = temp_audio_path_base + ".%(ext)s"
+        
+        # yt-dlp options
+        ydl_opts = {
+            'format': 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio',
+            'outtmpl': temp_audio_tmpl,
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': False,
+            'postprocessors': [],
+        }
+        
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            if source is None:
                 search_results = ydl.extract_info(f"ytsearch1:{search_query}", download=False)
                 if not search_results or 'entries' not in search_results or not search_results['entries']:
                     raise Exception(f"No YouTube videos found for: {search_query}")
                 
                 video_info = search_results['entries'][0]
-                video_url = video_info['url']
-                ydl.download([video_url])
-            
-            # Find downloaded file
-            downloaded_files = glob.glob(temp_audio_path_base + ".*")
-            if not downloaded_files:
-                raise Exception("Download completed but file not found")
-            
-            temp_audio_path = downloaded_files[0]
-            
-            # Extract segment
-            audio = AudioSegment.from_file(temp_audio_path)
-            if end_time is not None:
-                segment = audio[start_time*1000:end_time*1000]
-            else:
-                segment = audio[start_time*1000:]
-            
-            # Export as WAV
-            segment.export(output_path, format="wav")
-            
+                source = video_info['url']
+            ydl.download([source])
+        
+        # Find downloaded file
+        downloaded_files = glob.glob(temp_audio_path_base + ".*")
+        if not downloaded_files:
+            raise Exception("Download completed but file not found")
+        
+        return downloaded_files[0], downloaded_files + [temp_audio_path_base]
+    
+    @staticmethod
+    def ingest_format():
+        """(target sample rate or None to keep the source rate, downmix mode) from AUDIO_SAMPLE_RATE / AUDIO_DOWNMIX"""
+        downmix = current_app.config['AUDIO_DOWNMIX']
+        if downmix not in ('left', 'right', 'mix', 'stereo'):
+            raise ValueError(f"Unknown AUDIO_DOWNMIX: {downmix}. Expected left, right, mix or stereo")
+        return current_app.config['AUDIO_SAMPLE_RATE'] or None, downmix
+    
+    @staticmethod
+    def decode_channel(downmix):
+        """audio.decode channel mode for a downmix mode: stereo keeps every channel"""
+        return 'all' if downmix == 'stereo' else downmix
+    
+    @staticmethod
+    def fetch_audio(song_title, artist, start_time=0, end_time=None, source=None,
+                    segment_only=None, channel=None, spotify_id=None):
+        """
+        Decode start_time..end_time of a song into memory; returns (data, sample_rate, num_channels)
+        source: media URL or local file to use instead of searching YouTube (e.g. a stand-in for testing)
+        segment_only: fetch only the window instead of the whole track (default DOWNLOAD_SEGMENT_ONLY)
+        channel: see audio.decode.CHANNEL_MODES (default AUDIO_DOWNMIX)
+        spotify_id: download cache key; without it the normalized search query is used
+        ffmpeg resamples to AUDIO_SAMPLE_RATE while decoding (see ingest_format)
+        With the download cache enabled (DOWNLOAD_CACHE_BYTES) the whole track is downloaded once,
+        instead of just the window, and every later window of it is decoded from the cached file
+        (see app/services/download_cache.py)
+        """
+        from audio.decode import decode_audio
+        from app.services.download_cache import cache_key, get_download_cache
+        
+        target_rate, downmix = AudioService.ingest_format()
+        search_query = f"{song_title} {artist} audio"
+        
+        decode_options = {
+            'sample_rate': target_rate,
+            'channel': channel or AudioService.decode_channel(downmix),
+            'start_time': start_time,
+            'end_time': end_time,
+            'seek_margin': current_app.config['DOWNLOAD_SEGMENT_MARGIN'],
+            'ffmpeg': current_app.config['FFMPEG_BINARY'],
+        }
+        
+        cache = get_download_cache() if source is None else None
+        if cache is not None:
+            key = cache_key(spotify_id, search_query)
+            cached_path = cache.get(key, search_query)
+            try:
+                return decode_audio(cached_path, **decode_options)
+            except Exception:
+                if os.path.exists(cached_path):
+                    raise
+                # Evicted by another process between get() and decoding: fetch it once more
+                return decode_audio(cache.get(key, search_query), **decode_options)
+        
+        if segment_only is None:
+            segment_only = current_app.config['DOWNLOAD_SEGMENT_ONLY']
+        
+        if segment_only or (source is not None and os.path.exists(source)):
+            # ffmpeg seeks into the stream itself, so only the window is fetched
+            http_headers = None
+            if source is None:
+                source, http_headers = AudioService._resolve_youtube_stream(search_query)
+            return decode_audio(source, http_headers=http_headers, **decode_options)
+        
+        temp_audio_path, temp_files = AudioService._download_full_track(search_query, source)
+        try:
+            return decode_audio(temp_audio_path, **decode_options)
+        finally:
             # Clean up temp files
-            for f in downloaded_files:
-                os.remove(f)
-            
+            for f in temp_files:
+                if os.path.exists(f):
+                    os.remove(f)
+    
+    @staticmethod
+    def download_from_youtube(song_title, artist, output_path, start_time=0, end_time=None,
+                              source=None, segment_only=None):
+        """Download audio from YouTube and save start_time..end_time as a 16-bit WAV (see fetch_audio)"""
+        try:
+            data, sample_rate, _ = AudioService.fetch_audio(
+                song_title, artist, start_time, end_time, source, segment_only, channel='all'
+            )
+            sf.write(output_path, data, sample_rate, subtype='PCM_16')
             return True
             
         except Exception as e:
@@ -105,8 +428,327 @@ class AudioService:
             return False
     
     @staticmethod
-    def process_through_dft(input_file, output_folder, base_filename):
-        """Process audio through DFT pipeline"""
+    def has_spectrum(song_name):
+        """Whether a song has a stored spectrum to render tiers and residuals from"""
+        song_folder = AudioService.resolve_song_folder(song_name)
+        return bool(song_folder) and os.path.exists(spectrum_path(song_folder))
+    
+    @staticmethod
+    def supports_client_tiers(song_name):
+        """
+        Whether a song can use client synthesis or progressive delivery: it needs a stored
+        spectrum, and the browser side only handles mono
+        """
+        from audio.spectrum_store import spectrum_channels
+        
+        if not AudioService.has_spectrum(song_name):
+            return False
+        song_folder = AudioService.resolve_song_folder(song_name)
+        channels = load_manifest(song_folder).get('channels') or spectrum_channels(song_folder)
+        return channels == 1
+    
+    @staticmethod
+    def coefficient_payload(song_name):
+        """
+        (digest, bytes) of a song's ranked coefficients for client-side synthesis, trimmed to the
+        largest available tier (see audio.spectrum_store.encode_coefficient_payload); None without a
+        spectrum, or for stereo songs
+        """
+        from audio.spectral_layers import coefficients_covered, tier_sizes
+        from audio.spectrum_store import PAYLOAD_VERSION, encode_coefficient_payload, load_spectrum
+        from app.services.render_cache import get_render_cache
+        
+        if not AudioService.supports_client_tiers(song_name):
+            return None
+        song_folder = AudioService.resolve_song_folder(song_name)
+        levels = [int(freq) for freq in AudioService.get_available_frequencies(song_name)]
+        seed = load_manifest(song_folder).get('spectrum') or str(os.stat(spectrum_path(song_folder)).st_mtime_ns)
+        digest = derived_digest(seed, f'coefficients:{max(levels)}:v{PAYLOAD_VERSION}', 'bin')
+        
+        def render():
+            stored = load_spectrum(song_folder)
+            count = tier_sizes(coefficients_covered(stored.bins, stored.n), [max(levels)])[0]
+            return encode_coefficient_payload(stored, count)
+        
+        key = ('coefficients', os.path.abspath(song_folder), digest)
+        return digest, get_render_cache().get_or_render(key, render)
+    
+    @staticmethod
+    def residual_version(song_folder, levels):
+        """
+        Content version of a song's residual set (for URLs and ETags), or None without a stored
+        spectrum or for stereo songs (see supports_client_tiers)
+        Fixed by the spectrum, the tier levels, the residual format and its render settings
+        """
+        from audio.spectrum_store import spectrum_channels
+        
+        manifest = load_manifest(song_folder)
+        seed = manifest.get('spectrum')
+        if not seed:
+            try:
+                seed = str(os.stat(spectrum_path(song_folder)).st_mtime_ns)
+            except FileNotFoundError:
+                return None
+        if (manifest.get('channels') or spectrum_channels(song_folder)) != 1:
+            return None
+        levels_key = ','.join(str(level) for level in sorted(levels))
+        fmt = current_app.config['PROGRESSIVE_RESIDUAL_FORMAT']
+        return derived_digest(seed, f'residuals:{levels_key}', fmt, AudioService.render_settings(fmt))
+    
+    @staticmethod
+    def _render_residuals(song_folder, levels, version):
+        """
+        Render and cache every residual of a song (see audio.spectral_layers.render_residual_tiers)
+        Residuals share one gain so they sum correctly; gains[k] restores tier k's normalized level.
+        Returns (manifest JSON bytes, {level: residual file bytes}); the residuals are also cached.
+        """
+        import json
+        import numpy as np
+        from audio.encode import encode_audio
+        from audio.spectral_layers import render_residual_tiers
+        from audio.spectrum_store import load_spectrum
+        from app.services.render_cache import get_render_cache
+        
+        fmt = current_app.config['PROGRESSIVE_RESIDUAL_FORMAT']
+        stored = load_spectrum(song_folder)
+        levels, residuals, peaks = render_residual_tiers(stored.bins, stored.values, stored.n, levels,
+                                                         stored.length)
+        
+        # One gain for all residuals keeps their sum exact; 16-bit encodings must not clip
+        loudest = float(np.abs(residuals).max()) or 1.0
+        scale = 0.999 / loudest
+        gains = [float(1 / (scale * peak)) if peak > 0 else 0.0 for peak in peaks]
+        
+        cache = get_render_cache()
+        encoded = {}
+        for level, residual in zip(levels, residuals):
+            encoded[level] = encode_audio(residual * scale, stored.sample_rate, fmt,
+                                          current_app.config['TIER_OPUS_BITRATE'], current_app.config['FFMPEG_BINARY'])
+            cache.put(('residual', os.path.abspath(song_folder), version, level), encoded[level])
+        
+        manifest = {'levels': levels, 'gains': gains, 'sample_rate': stored.sample_rate, 'format': fmt}
+        return json.dumps(manifest).encode(), encoded
+    
+    @staticmethod
+    def residual_manifest(song_name):
+        """
+        Levels, per-tier playback gains and residual URLs for progressive delivery
+        Returns None if the song has no stored spectrum
+        """
+        import json
+        from app.services.render_cache import get_render_cache
+        
+        song_folder = AudioService.resolve_song_folder(song_name)
+        if not song_folder:
+            return None
+        levels = [int(freq) for freq in AudioService.get_available_frequencies(song_name)]
+        version = AudioService.residual_version(song_folder, levels)
+        if version is None or not levels:
+            return None
+        
+        key = ('residual-manifest', os.path.abspath(song_folder), version)
+        manifest = json.loads(get_render_cache().get_or_render(
+            key, lambda: AudioService._render_residuals(song_folder, levels, version)[0]
+        ))
+        manifest['version'] = version
+        manifest['urls'] = [
+            url_for('main.residual_audio', song_name=song_name, level=level,
+                    digest=version, fmt=manifest['format'])
+            for level in manifest['levels']
+        ]
+        return manifest
+    
+    @staticmethod
+    def render_residual(song_name, level, version):
+        """Encoded residual for one tier, or None if the song, level or version does not match"""
+        from app.services.render_cache import get_render_cache
+        
+        song_folder = AudioService.resolve_song_folder(song_name)
+        if not song_folder:
+            return None
+        levels = [int(freq) for freq in AudioService.get_available_frequencies(song_name)]
+        if level not in levels or AudioService.residual_version(song_folder, levels) != version:
+            return None
+        
+        # Normally cached when the manifest was built; after an eviction the whole set is re-rendered
+        key = ('residual', os.path.abspath(song_folder), version, level)
+        return get_render_cache().get_or_render(
+            key, lambda: AudioService._render_residuals(song_folder, levels, version)[1][level]
+        )
+    
+    @staticmethod
+    def _write_tiers(tiers, sample_rate, song_output_folder, total, progress_callback=None):
+        from app.utils.helpers.read_wav_file import save_audio
+        from audio.encode import write_audio
+        
+        compressed_formats = AudioService.tier_formats()[:-1]
+        opus_bitrate = current_app.config['TIER_OPUS_BITRATE']
+        ffmpeg = current_app.config['FFMPEG_BINARY']
+        entries = {}
+        duration = None
+        
+        for done, (freq_count, _, reconstructed_audio) in enumerate(tiers, start=1):
+            # Stereo tiers come out (channels, samples); files want interleaved frames
+            reconstructed_audio = reconstructed_audio.T
+            duration = len(reconstructed_audio) / sample_rate
+            
+            # Save reconstructed audio
+            output_file = os.path.join(song_output_folder, f'reconstructed_audio_{freq_count}.wav')
+            save_audio(reconstructed_audio, sample_rate, output_file)
+            entries[tier_key(freq_count, 'wav')] = tier_entry(output_file, duration)
+            
+            # Smaller encodings for clients that accept them (see choose_tier_format)
+            for fmt in compressed_formats:
+                output_file = os.path.join(song_output_folder, f'reconstructed_audio_{freq_count}.{fmt}')
+                write_audio(reconstructed_audio, sample_rate, output_file, fmt, opus_bitrate, ffmpeg)
+                entries[tier_key(freq_count, fmt)] = tier_entry(output_file, duration)
+            
+            if progress_callback:
+                progress_callback(done, total)
+        
+        # Recorded once here so requests can list tiers and build URLs and ETags without touching files
+        update_manifest(song_output_folder, tiers=entries, sample_rate=sample_rate, duration=duration)
+        AudioService.refresh_pack(song_output_folder)
+    
+    @staticmethod
+    def _use_stft_engine(num_samples, sample_rate):
+        engine = current_app.config['LAYER_ENGINE']
+        if engine == 'auto':
+            return num_samples / sample_rate > current_app.config['STFT_AUTO_SECONDS']
+        return engine == 'stft'
+    
+    @staticmethod
+    def _process_samples_stft(data, sample_rate, song_output_folder, frequency_counts, progress_callback=None):
+        """
+        Write tiers with the chunked STFT engine (audio/stft_layers.py), whose memory does not grow
+        with clip length. It never holds a whole-clip spectrum, so no spectrum artifact is saved and
+        the song's tiers are served from the files written here.
+        """
+        from audio.encode import transcode_file
+        from audio.stft_layers import write_stft_tiers
+        
+        # An artifact from an earlier ingest would no longer match these tiers
+        if os.path.exists(spectrum_path(song_output_folder)):
+            os.remove(spectrum_path(song_output_folder))
+        
+        wav_files = [os.path.join(song_output_folder, f'reconstructed_audio_{level}.wav')
+                     for level in frequency_counts]
+        write_stft_tiers(data, sample_rate, frequency_counts, wav_files,
+                         current_app.config['STFT_FRAME_SIZE'], progress_callback)
+        
+        duration = data.shape[-1] / sample_rate
+        entries = {}
+        for level, wav_file in zip(frequency_counts, wav_files):
+            entries[tier_key(level, 'wav')] = tier_entry(wav_file, duration)
+            for fmt in AudioService.tier_formats()[:-1]:
+                output_file = os.path.join(song_output_folder, f'reconstructed_audio_{level}.{fmt}')
+                transcode_file(wav_file, output_file, fmt, current_app.config['TIER_OPUS_BITRATE'],
+                               current_app.config['FFMPEG_BINARY'])
+                entries[tier_key(level, fmt)] = tier_entry(output_file, duration)
+        update_manifest(song_output_folder, tiers=entries, remove_spectrum=True,
+                        sample_rate=sample_rate, duration=duration)
+        AudioService.refresh_pack(song_output_folder)
+    
+    @staticmethod
+    def process_samples(data, sample_rate, output_folder, progress_callback=None):
+        """
+        Write every FREQUENCY_LEVELS tier of already-decoded mono samples, plus the song's
+        spectrum artifact so it can be re-tiered later without the source
+        Samples at another rate than AUDIO_SAMPLE_RATE are resampled first; returns the rate tiers were written at
+        progress_callback, if given, is called as (tiers_done, tiers_total) after each tier is saved
+        """
+        import numpy as np
+        from audio import fft_backend
+        from audio.resample import resample
+        from audio.spectral_layers import rank_spectrum, render_ranked_tiers, render_tiers
+        from audio.spectrum_store import save_spectrum
+        
+        # Decoded multichannel samples are (samples, channels); the engines want (channels, samples)
+        if data.ndim == 2:
+            data = data[:, 0] if data.shape[1] == 1 else np.ascontiguousarray(data[:, :2].T)
+        
+        target_rate, _ = AudioService.ingest_format()
+        if target_rate and target_rate != sample_rate:
+            data = resample(data, sample_rate, target_rate)
+            sample_rate = target_rate
+        
+        # Get frequency levels from config
+        frequency_counts = current_app.config['FREQUENCY_LEVELS']
+        tier_mode = current_app.config['TIER_RECONSTRUCTION_MODE']
+        spectrum_level = current_app.config['SPECTRUM_CACHE_LEVEL'] or max(frequency_counts)
+        
+        # Create output folder
+        song_output_folder = os.path.join(current_app.config['AUDIO_OUTPUT_FOLDER'], output_folder)
+        os.makedirs(song_output_folder, exist_ok=True)
+        
+        if AudioService._use_stft_engine(data.shape[-1], sample_rate):
+            AudioService._process_samples_stft(data, sample_rate, song_output_folder, frequency_counts,
+                                               progress_callback)
+            return sample_rate
+        
+        # One ranking serves both the artifact and the nested tier modes
+        # The clip is zero-padded to a fast transform length; tiers are trimmed back to its length
+        length = data.shape[-1]
+        n = fft_backend.transform_length(length)
+        bins, values = rank_spectrum(data, max(spectrum_level, max(frequency_counts)), n)
+        artifact = save_spectrum(song_output_folder, bins, values, n, sample_rate, length)
+        channels = 1 if data.ndim == 1 else len(data)
+        update_manifest(song_output_folder, spectrum=file_digest(artifact), channels=channels,
+                        sample_rate=sample_rate, duration=length / sample_rate)
+        
+        if not current_app.config['PRERENDER_TIER_WAVS']:
+            # Tiers are rendered from the artifact when first played; files from an earlier
+            # ingest would be served ahead of it
+            AudioService._remove_tier_files(song_output_folder)
+            if progress_callback:
+                progress_callback(len(frequency_counts), len(frequency_counts))
+            return sample_rate
+        
+        if tier_mode == 'independent':
+            tiers = render_tiers(data, frequency_counts, tier_mode, n)
+        else:
+            tiers = render_ranked_tiers(bins, values, n, frequency_counts, tier_mode, length)
+        AudioService._write_tiers(tiers, sample_rate, song_output_folder, len(frequency_counts), progress_callback)
+        return sample_rate
+    
+    @staticmethod
+    def retier(song_name, levels=None):
+        """
+        Re-render tiers for a song from its stored spectrum artifact (no download or decode)
+        Returns the levels written, or None if the song has no artifact
+        """
+        from audio.spectral_layers import coefficients_covered, render_ranked_tiers
+        from audio.spectrum_store import load_spectrum
+        
+        if levels is None:
+            levels = current_app.config['FREQUENCY_LEVELS']
+        tier_mode = current_app.config['TIER_RECONSTRUCTION_MODE']
+        if tier_mode == 'independent':
+            tier_mode = 'batched'  # same output, but works from the stored ranking
+        
+        song_output_folder = os.path.join(current_app.config['AUDIO_OUTPUT_FOLDER'], song_name)
+        stored = load_spectrum(song_output_folder)
+        if stored is None:
+            return None
+        
+        covered = int(coefficients_covered(stored.bins, stored.n)[-1]) if len(stored.bins) else 0
+        for level in levels:
+            if level > covered:
+                current_app.logger.warning(
+                    f"{song_name}: tier {level} exceeds the {covered} stored coefficients; "
+                    f"it will use every stored coefficient"
+                )
+        
+        tiers = render_ranked_tiers(stored.bins, stored.values, stored.n, levels, tier_mode, stored.length)
+        AudioService._write_tiers(tiers, stored.sample_rate, song_output_folder, len(levels))
+        return list(levels)
+    
+    @staticmethod
+    def process_through_dft(input_file, output_folder, base_filename, progress_callback=None):
+        """
+        Process audio through DFT pipeline
+        progress_callback, if given, is called as (tiers_done, tiers_total) after each tier is saved
+        """
         try:
             # Import using absolute paths for reliability
             import sys
@@ -121,51 +763,13 @@ class AudioService:
             
             # Import the required functions
             from audio.layersFFT import read_audio_file
-            from app.utils.helpers.read_wav_file import save_audio
-            
-            # Read audio file
-            data, sample_rate, num_channels = read_audio_file(input_file)
-            
-            # Compute FFT
-            fft_result = np.fft.fft(data)
-            freq = np.fft.fftfreq(len(data), 1/sample_rate)
-            magnitude = np.abs(fft_result)
-            
-            # Filter noise
-            min_magnitude_threshold = np.max(magnitude) * 0.01
-            significant_indices = magnitude > min_magnitude_threshold
-            
-            # Get frequency levels from config
-            frequency_counts = current_app.config['FREQUENCY_LEVELS']
-            available_indices = np.where(significant_indices)[0]
             
-            # Create output folder
-            song_output_folder = os.path.join(current_app.config['AUDIO_OUTPUT_FOLDER'], output_folder)
-            os.makedirs(song_output_folder, exist_ok=True)
+            # Read audio file (non-WAV input is resampled while decoding; WAVs by process_samples)
+            target_rate, downmix = AudioService.ingest_format()
+            data, sample_rate, num_channels = read_audio_file(input_file, sample_rate=target_rate,
+                                                              channel=AudioService.decode_channel(downmix))
             
-            for freq_count in frequency_counts:
-                # Get top frequencies
-                top_indices = available_indices[np.argsort(magnitude[available_indices])[-freq_count:][::-1]]
-                top_freqs = freq[top_indices]
-                top_magnitudes = magnitude[top_indices]
-                
-                # Create filtered FFT result
-                filtered_fft = np.zeros_like(fft_result)
-                
-                # Copy significant frequency components
-                for freq_val, mag_val in zip(top_freqs, top_magnitudes):
-                    freq_index = np.argmin(np.abs(freq - freq_val))
-                    filtered_fft[freq_index] = fft_result[freq_index]
-                    if freq_index > 0:
-                        filtered_fft[len(fft_result) - freq_index] = np.conj(fft_result[freq_index])
-                
-                # Reconstruct audio
-                reconstructed_audio = np.real(np.fft.ifft(filtered_fft))
-                reconstructed_audio = reconstructed_audio / np.max(np.abs(reconstructed_audio))
-                
-                # Save reconstructed audio
-                output_file = os.path.join(song_output_folder, f'reconstructed_audio_{freq_count}.wav')
-                save_audio(reconstructed_audio, sample_rate, output_file)
+            AudioService.process_samples(data, sample_rate, output_folder, progress_callback)
             
             return True
             
@@ -0,0 +1,174 @@
+"""
+On-disk cache of downloaded source audio
+
+Re-ingesting or re-trimming a song (new start/end times, or a retry after a failed DFT)
+decodes the cached full track locally instead of searching and downloading it again.
+
+Layout under the cache folder:
+    objects/<sha256 of the file>.<ext>  downloaded audio, content-addressed (shared by keys)
+    keys/<sha256 of the key>.json       {"key", "object", "fetched_at"}
+
+Keys are a Spotify track id when known, else the normalized search query. An object's mtime
+is its last use: hits touch it and eviction removes the least recently used objects until the
+folder fits in max_bytes. Entries older than ttl seconds are fetched again. Files are written
+to a temporary name and renamed, so several ingest processes can share one folder; another
+process's eviction can still remove an object before it is decoded, so AudioService.fetch_audio
+fetches it once more when that happens.
+
+The cache is off unless DOWNLOAD_CACHE_BYTES is set: it downloads whole tracks, where
+segment-only fetches (DOWNLOAD_SEGMENT_ONLY) transfer just the requested window.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from flask import current_app
+
+_CHUNK = 1 << 20
+
+
+def cache_key(spotify_id=None, search_query=None):
+    """Cache key for a track: its Spotify id, else the search query lowercased with whitespace collapsed"""
+    if spotify_id:
+        return f'spotify:{spotify_id}'
+    return 'query:' + ' '.join(search_query.lower().split())
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadCache:
+    """
+    Size-bounded LRU of downloaded source files with a TTL
+    fetch(search_query) downloads a track and returns (path, files to delete afterwards), like
+    AudioService._download_full_track; tests can pass a fake instead of yt-dlp
+    """
+
+    def __init__(self, folder, max_bytes, ttl, fetch):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.fetch = fetch
+        self._objects = os.path.join(folder, 'objects')
+        self._keys = os.path.join(folder, 'keys')
+        self._lock = threading.Lock()
+        os.makedirs(self._objects, exist_ok=True)
+        os.makedirs(self._keys, exist_ok=True)
+
+    def _key_path(self, key):
+        return os.path.join(self._keys, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+    def lookup(self, key):
+        """Path of the cached file for key, or None if missing or expired; a hit counts as a use"""
+        try:
+            with open(self._key_path(key), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if self.ttl and time.time() - entry['fetched_at'] > self.ttl:
+            return None
+
+        path = os.path.join(self._objects, entry['object'])
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None  # evicted by another process
+        return path
+
+    def get(self, key, search_query):
+        """Path of the cached file for key, downloading it with fetch(search_query) on a miss"""
+        path = self.lookup(key)
+        if path:
+            return path
+
+        downloaded, temp_files = self.fetch(search_query)
+        try:
+            path = self._store(key, downloaded)
+        finally:
+            for f in temp_files:
+                if os.path.exists(f):
+                    os.remove(f)
+        self.evict(keep=path)
+        return path
+
+    def _store(self, key, downloaded):
+        digest = _sha256_file(downloaded)
+        ext = os.path.splitext(downloaded)[1]
+        name = digest + ext
+        path = os.path.join(self._objects, name)
+
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path)
+            else:
+                fd, temp_path = tempfile.mkstemp(dir=self._objects, suffix='.part')
+                os.close(fd)
+                shutil.move(downloaded, temp_path)
+                os.replace(temp_path, path)
+
+            fd, temp_path = tempfile.mkstemp(dir=self._keys, suffix='.part')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'object': name, 'fetched_at': time.time()}, f)
+            os.replace(temp_path, self._key_path(key))
+        return path
+
+    def evict(self, keep=None):
+        """
+        Remove the least recently used objects until the cache fits in max_bytes; returns how many
+        keep: an object path that stays even if it alone is over budget (the file about to be decoded);
+        it is only protected from this process's eviction
+        """
+        with self._lock:
+            objects = []
+            for entry in os.scandir(self._objects):
+                if entry.is_file() and not entry.name.endswith('.part'):
+                    stat = entry.stat()
+                    objects.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in objects)
+            removed = 0
+            for _, size, path in sorted(objects):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+        # Key files pointing at a removed object are treated as misses by lookup()
+        return removed
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.folder, ignore_errors=True)
+            os.makedirs(self._objects, exist_ok=True)
+            os.makedirs(self._keys, exist_ok=True)
+
+
+def get_download_cache():
+    """The current app's source download cache, created on first use; None when DOWNLOAD_CACHE_BYTES is 0"""
+    from app.services.audio_service import AudioService
+
+    if not current_app.config['DOWNLOAD_CACHE_BYTES']:
+        return None
+    cache = current_app.extensions.get('download_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('download_cache', DownloadCache(
+            current_app.config['DOWNLOAD_CACHE_FOLDER'],
+            current_app.config['DOWNLOAD_CACHE_BYTES'],
+            current_app.config['DOWNLOAD_CACHE_TTL'],
+            AudioService._download_full_track,
+        ))
+    return cache
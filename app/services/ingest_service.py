@@ -0,0 +1,183 @@
+"""
+Ingest service for queueing and running background song processing jobs
+"""
+
+from datetime import datetime, timedelta
+from flask import current_app
+from app.models import Song, IngestJob
+from app.services.audio_service import AudioService
+from app import db
+
+class IngestService:
+    """Service for the download + DFT job queue (see scripts/ingest_worker.py)"""
+
+    @staticmethod
+    def safe_name(text):
+        """Strip characters that are not safe in a file name"""
+        return "".join(c for c in text if c.isalnum() or c in (' ', '-', '_')).rstrip()
+
+    @staticmethod
+    def song_folder_name(title, artist):
+        """Folder under AUDIO_OUTPUT_FOLDER used for a song's frequency files"""
+        safe_title = IngestService.safe_name(title)
+        safe_artist = IngestService.safe_name(artist)
+        return f"{safe_artist}_{safe_title}".replace(' ', '')
+
+    @staticmethod
+    def enqueue(title, artist, album=None, week=1, start_time=0, end_time=None, spotify_id=None):
+        """
+        Queue a song for processing
+        Returns (job, created); an unfinished job for the same song is returned instead of a new one
+        """
+        folder_name = IngestService.song_folder_name(title, artist)
+
+        existing_job = IngestJob.query.filter(
+            IngestJob.song_folder_name == folder_name,
+            IngestJob.status.in_(IngestJob.ACTIVE_STATUSES)
+        ).first()
+        if existing_job:
+            return existing_job, False
+
+        job = IngestJob(
+            title=title,
+            artist=artist,
+            album=album,
+            week=week,
+            spotify_id=spotify_id,
+            start_time=start_time,
+            end_time=end_time,
+            song_folder_name=folder_name,
+            status='queued',
+            progress=0,
+            message='Waiting for a worker...'
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job, True
+
+    @staticmethod
+    def get_job(job_id):
+        """Get a job by id"""
+        return IngestJob.query.get(job_id)
+
+    @staticmethod
+    def claim_next():
+        """
+        Atomically move the oldest queued job to running and return it
+        Jobs for a song that another job is already processing are dropped as duplicates
+        """
+        while True:
+            job = IngestJob.query.filter_by(status='queued').order_by(IngestJob.created_at, IngestJob.id).first()
+            if not job:
+                return None
+
+            busy = IngestJob.query.filter(
+                IngestJob.song_folder_name == job.song_folder_name,
+                IngestJob.status == 'running'
+            ).first()
+            now = datetime.utcnow()
+            if busy:
+                changes = {'status': 'duplicate', 'finished_at': now,
+                           'message': f'Already being processed by job {busy.id}'}
+            else:
+                changes = {'status': 'running', 'started_at': now, 'message': 'Starting...'}
+
+            # Conditional update so two workers can never claim the same row
+            claimed = IngestJob.query.filter_by(id=job.id, status='queued').update(
+                changes, synchronize_session=False
+            )
+            db.session.commit()
+
+            if claimed and not busy:
+                db.session.refresh(job)
+                return job
+
+    @staticmethod
+    def fail_stale_jobs():
+        """Mark jobs left running past INGEST_JOB_TIMEOUT (e.g. a killed worker) as failed"""
+        cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['INGEST_JOB_TIMEOUT'])
+        count = IngestJob.query.filter(
+            IngestJob.status == 'running',
+            IngestJob.started_at < cutoff
+        ).update({
+            'status': 'failed',
+            'error': 'Worker stopped before the job finished',
+            'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    @staticmethod
+    def _set_progress(job, progress, message):
+        job.progress = progress
+        job.message = message
+        db.session.commit()
+
+    @staticmethod
+    def _finish(job, status, message, error=None):
+        job.status = status
+        job.message = message
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        if status == 'completed':
+            job.progress = 100
+        db.session.commit()
+
+    @staticmethod
+    def run(job_id):
+        """Download, process and register the song for a claimed job"""
+        job = IngestJob.query.get(job_id)
+        if not job:
+            return False
+
+        title, artist = job.title, job.artist
+        try:
+            if Song.query.filter_by(title=title, artist=artist).first():
+                IngestService._finish(job, 'duplicate', f"Song '{title}' by {artist} already exists in the database")
+                return False
+
+            # Decode the requested window straight into memory
+            IngestService._set_progress(job, 5, f'Downloading "{title}" by {artist} from YouTube...')
+            try:
+                data, sample_rate, _ = AudioService.fetch_audio(title, artist, job.start_time, job.end_time,
+                                                                spotify_id=job.spotify_id)
+            except Exception as e:
+                current_app.logger.error(f"Error downloading from YouTube: {e}")
+                IngestService._finish(job, 'failed', 'Download failed', f"Failed to download audio for '{title}' by {artist}")
+                return False
+
+            # Process through DFT pipeline, 40% -> 95% across the tiers
+            IngestService._set_progress(job, 40, 'Generating frequency versions...')
+
+            def on_tier(done, total):
+                IngestService._set_progress(job, 40 + 55 * done // total, f'Generated {done}/{total} frequency versions')
+
+            tier_rate = AudioService.process_samples(data, sample_rate, job.song_folder_name, progress_callback=on_tier)
+
+            # Add song to database
+            new_song = Song(
+                title=title,
+                artist=artist,
+                album=job.album,
+                week=job.week,
+                base_filename=job.song_folder_name,
+                spotify_id=job.spotify_id,
+                has_frequency_versions=True,
+                sample_rate=tier_rate,
+                downmix=AudioService.ingest_format()[1]
+            )
+            db.session.add(new_song)
+            db.session.flush()
+            job.song_id = new_song.id
+            IngestService._finish(job, 'completed',
+                                  f"Successfully processed '{title}' by {artist}. Song added to database with ID: {new_song.id}")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error running ingest job {job_id}: {e}")
+            job = IngestJob.query.get(job_id)
+            if job:
+                IngestService._finish(job, 'failed', 'Processing failed', f"Processing failed: {str(e)}")
+            return False
+
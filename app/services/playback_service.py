@@ -0,0 +1,88 @@
+"""
+Resolution of the song the public game is playing, cached per process
+"""
+
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from app import db
+from app.models import GameState, Song
+
+class PlaybackSong(namedtuple('PlaybackSong', 'id title artist album base_filename')):
+    """Immutable snapshot of the playback song's fields, safe to share across requests"""
+    __slots__ = ()
+    
+    @property
+    def available_frequencies(self):
+        from app.services.audio_service import AudioService
+        return AudioService.get_available_frequencies(self.base_filename)
+    
+    def tier_sources(self, frequency):
+        from app.services.audio_service import AudioService
+        return AudioService.get_tier_sources(self.base_filename, frequency)
+
+class _CachedSong:
+    """The snapshot a process is serving and the CacheVersion it was loaded at"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.key = None
+        self.version = None
+        self.song = None
+        self.checked_at = 0.0
+
+class PlaybackService:
+    """
+    The playback song is looked up once per GameState version. Each process re-reads the
+    version at most every ACTIVE_SONG_CHECK_INTERVAL seconds, so other workers see a change
+    within that interval; the process making the change sees it immediately.
+    """
+    
+    @staticmethod
+    def _cache():
+        return current_app.extensions.setdefault('playback_song_cache', _CachedSong())
+    
+    @staticmethod
+    def _load(forced, active_song_id):
+        song = None
+        if forced:
+            song = Song.query.filter_by(base_filename=forced).first()
+        if song is None and active_song_id is not None:
+            song = db.session.get(Song, active_song_id)
+        if song is None:
+            return None
+        return PlaybackSong(song.id, song.title, song.artist, song.album, song.base_filename)
+    
+    @staticmethod
+    def get_playback_song():
+        """Song used for the public game: forced folder (dev) or DB is_active; a PlaybackSong or None"""
+        forced = str(current_app.config.get('FORCED_PLAYBACK_BASE_FILENAME') or '').strip()
+        cache = PlaybackService._cache()
+        now = time.monotonic()
+        
+        with cache.lock:
+            if cache.key == forced and now - cache.checked_at < current_app.config['ACTIVE_SONG_CHECK_INTERVAL']:
+                return cache.song
+            known_version = cache.version if cache.key == forced else None
+        
+        # One primary-key read; the state row is not taken from the session, which may hold an old copy
+        state = db.session.query(GameState.version, GameState.active_song_id).filter_by(id=GameState.ROW_ID).first()
+        version, active_song_id = state if state else (0, None)
+        song = cache.song if version == known_version else PlaybackService._load(forced, active_song_id)
+        
+        with cache.lock:
+            cache.key, cache.version, cache.song, cache.checked_at = forced, version, song, now
+        return song
+    
+    @staticmethod
+    def activate(song_id):
+        """
+        Make song_id the active song (None = none) with one atomic GameState update, and drop this
+        process's snapshot; the caller commits
+        """
+        GameState.activate(song_id)
+        cache = PlaybackService._cache()
+        with cache.lock:
+            cache.key = cache.version = cache.song = None
+            cache.checked_at = 0.0
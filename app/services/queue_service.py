@@ -4,6 +4,7 @@ Queue service for managing weekly song scheduling
 
 from datetime import datetime, date, timedelta
 from app.models.song import Song, SongQueue, SongHistory
+from app.services.playback_service import PlaybackService
 from app import db
 import os
 import shutil
@@ -67,18 +68,16 @@ class QueueService:
         """Activate today's song and deactivate others"""
         today = date.today()
         
-        # Deactivate all currently active songs
-        Song.query.update({'is_active': False})
-        
         # Get today's queue entry
         queue_entry = SongQueue.query.filter_by(
             scheduled_date=today,
             status='queued'
         ).first()
         
+        # Activate the song, or leave no song active
+        PlaybackService.activate(queue_entry.song_id if queue_entry else None)
+        
         if queue_entry:
-            # Activate the song
-            queue_entry.song.is_active = True
             queue_entry.status = 'active'
             
             # Add to song history
@@ -0,0 +1,93 @@
+"""
+In-process cache for audio rendered on demand
+"""
+
+import threading
+from collections import OrderedDict
+from flask import current_app
+
+class _PendingRender:
+    """A render in progress that other requests for the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class RenderCache:
+    """
+    Size-bounded LRU of rendered bytes
+    Concurrent misses for the same key are merged: one caller renders, the rest wait for its result
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        """Return cached bytes for key, calling render() at most once across concurrent misses"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _PendingRender()
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.result
+
+        try:
+            pending.result = render()
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+                if pending.error is None:
+                    self._store(key, pending.result)
+            pending.done.set()
+
+        return pending.result
+
+    def put(self, key, data):
+        """Insert bytes rendered alongside another entry (e.g. siblings produced by the same render)"""
+        with self._lock:
+            if key not in self._entries:
+                self._store(key, data)
+
+    def _store(self, key, data):
+        # Caller holds the lock
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.current_bytes -= len(self._entries.pop(key))
+        self._entries[key] = data
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+def get_render_cache():
+    """The current app's tier render cache, created on first use"""
+    cache = current_app.extensions.get('tier_render_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            'tier_render_cache', RenderCache(current_app.config['TIER_RENDER_CACHE_BYTES'])
+        )
+    return cache
@@ -0,0 +1,90 @@
+"""
+In-process snapshots of song and user statistics, versioned by CacheVersion counters
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from app.models import CacheVersion
+
+def song_stats_name(song_id):
+    """CacheVersion counter bumped whenever a guess is recorded for a song"""
+    return f'song_stats:{song_id}'
+
+def user_stats_name(user_id):
+    """CacheVersion counter bumped whenever a user's own guess is recorded"""
+    return f'user_stats:{user_id}'
+
+class StatsCache:
+    """
+    One value per counter name (with the key it was loaded for), kept until the counter's
+    version changes; loading a different key replaces it, so a user's snapshot follows the
+    current song. Each counter is re-read at most every check_interval seconds, so a guess
+    recorded by another worker shows up within that interval; invalidate() makes this
+    process's own guesses show up at once. Both maps are LRUs of at most max_entries names.
+    """
+
+    def __init__(self, check_interval, max_entries):
+        self.check_interval = check_interval
+        self.max_entries = max_entries
+        self._versions = OrderedDict()  # name -> (version, checked_at)
+        self._values = OrderedDict()  # name -> (version, key, value)
+        self._lock = threading.Lock()
+
+    def _put(self, entries, name, entry):
+        entries[name] = entry
+        entries.move_to_end(name)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def version(self, name):
+        """Current version of a counter, read from the database only when the last read is too old"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(name)
+            if cached and now - cached[1] < self.check_interval:
+                return cached[0]
+
+        version = CacheVersion.current(name)
+        with self._lock:
+            self._put(self._versions, name, (version, now))
+        return version
+
+    def get(self, name, key, load):
+        """
+        Cached value for (name, key) at the counter's current version, calling load() when stale
+        Nothing is cached when load() raises
+        """
+        version = self.version(name)
+        with self._lock:
+            cached = self._values.get(name)
+            if cached and cached[0] == version and cached[1] == key:
+                self._values.move_to_end(name)
+                return cached[2]
+
+        value = load()
+        with self._lock:
+            self._put(self._values, name, (version, key, value))
+        return value
+
+    def invalidate(self, name):
+        """Bump a counter (the caller commits) and forget this process's copy of its version"""
+        CacheVersion.bump(name)
+        with self._lock:
+            self._versions.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+            self._values.clear()
+
+def get_stats_cache():
+    """The current app's stats cache, created on first use"""
+    cache = current_app.extensions.get('stats_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            'stats_cache', StatsCache(current_app.config['STATS_CHECK_INTERVAL'],
+                                      current_app.config['STATS_CACHE_ENTRIES'])
+        )
+    return cache
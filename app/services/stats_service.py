@@ -3,71 +3,124 @@ Statistics service for managing user and song analytics
 """
 
 from app.models import UserStats, SongStats, Song
+from app.services.stats_cache import get_stats_cache, song_stats_name, user_stats_name
 from app import db
 from datetime import datetime
+import copy
 import json
 
 class StatsService:
     """Service for managing statistics"""
     
+    @staticmethod
+    def load_song_stats(song_id):
+        """Global stats for a song, straight from the database"""
+        song_stats = SongStats.query.filter_by(song_id=song_id).first()
+        if not song_stats:
+            return {'average_score': 0.0, 'total_plays': 0, 'total_correct_guesses': 0}
+        return {
+            'average_score': song_stats.average_score,
+            'total_plays': song_stats.total_plays,
+            'total_correct_guesses': song_stats.total_correct_guesses
+        }
+    
+    @staticmethod
+    def get_song_stats(song_id):
+        """Global stats for a song, from the in-process snapshot (reloaded only after a guess is recorded)"""
+        return dict(get_stats_cache().get(song_stats_name(song_id), song_id,
+                                          lambda: StatsService.load_song_stats(song_id)))
+    
+    @staticmethod
+    def get_cached_user_stats(user_id, current_song_id=None):
+        """get_user_stats from a per-user snapshot, reloaded only after that user's own guess"""
+        try:
+            stats = get_stats_cache().get(user_stats_name(user_id), current_song_id,
+                                          lambda: StatsService.load_user_stats(user_id, current_song_id))
+        except Exception as e:
+            # Not cached, so the next request tries the database again
+            print(f"Error getting user stats: {e}")
+            return StatsService._empty_user_stats()
+        # Callers add to the result; the snapshot stays untouched
+        return copy.deepcopy(stats)
+    
+    @staticmethod
+    def stats_etag(song_id, user_id=None):
+        """
+        ETag for a song's stats as seen by one user (or a guest), from the snapshot versions
+        Costs no query while the versions are fresh (see StatsCache)
+        """
+        cache = get_stats_cache()
+        etag = f'{song_id}.{cache.version(song_stats_name(song_id))}'
+        if user_id is not None:
+            etag += f'.u{user_id}.{cache.version(user_stats_name(user_id))}'
+        return etag
+    
     @staticmethod
     def get_user_stats(user_id, current_song_id=None):
         """Get user statistics for current song and all-time"""
         try:
-            # Get current song stats
-            current_song_stats = None
-            has_played_current = False
-            
-            if current_song_id:
-                current_song = Song.query.get(current_song_id)
-                if current_song:
-                    # Check if user has played current song
-                    user_stat = UserStats.query.filter_by(
-                        user_id=user_id, 
-                        song_id=current_song_id
-                    ).first()
-                    
-                    has_played_current = user_stat and user_stat.has_played
-                    
-                    # Get song stats
-                    song_stats = SongStats.query.filter_by(song_id=current_song_id).first()
-                    if song_stats:
-                        current_song_stats = {
-                            'average_score': song_stats.average_score,
-                            'total_plays': song_stats.total_plays,
-                            'total_correct_guesses': song_stats.total_correct_guesses
-                        }
-            
-            # Get all-time user stats for bar chart
-            all_user_stats = UserStats.query.filter_by(user_id=user_id).all()
-            points_distribution = {}
-            
-            for stat in all_user_stats:
-                if stat.correct_guess:
-                    score = max(0, 7 - stat.difficulty_level)
-                    points_distribution[score] = points_distribution.get(score, 0) + 1
-            
-            # Calculate max count for bar chart scaling
-            max_count = max(points_distribution.values()) if points_distribution else 1
-            
-            individual_stats = {
-                'points_distribution': points_distribution,
-                'max_count': max_count
-            }
-            
-            return {
-                'has_played_current': has_played_current,
-                'song_stats': current_song_stats or {'average_score': 0.0},
-                'individual_stats': individual_stats
-            }
-            
+            return StatsService.load_user_stats(user_id, current_song_id)
         except Exception as e:
             print(f"Error getting user stats: {e}")
-            return {
-                'has_played_current': False,
-                'song_stats': {'average_score': 0.0},
-                'individual_stats': {'points_distribution': {}, 'max_count': 1}
-            }
+            return StatsService._empty_user_stats()
+    
+    @staticmethod
+    def _empty_user_stats():
+        return {
+            'has_played_current': False,
+            'song_stats': {'average_score': 0.0},
+            'individual_stats': {'points_distribution': {}, 'max_count': 1}
+        }
+    
+    @staticmethod
+    def load_user_stats(user_id, current_song_id=None):
+        """get_user_stats straight from the database; raises on database errors"""
+        # Get current song stats
+        current_song_stats = None
+        has_played_current = False
+        
+        if current_song_id:
+            current_song = Song.query.get(current_song_id)
+            if current_song:
+                # Check if user has played current song
+                user_stat = UserStats.query.filter_by(
+                    user_id=user_id, 
+                    song_id=current_song_id
+                ).first()
+                
+                has_played_current = user_stat and user_stat.has_played
+                
+                # Get song stats
+                song_stats = SongStats.query.filter_by(song_id=current_song_id).first()
+                if song_stats:
+                    current_song_stats = {
+                        'average_score': song_stats.average_score,
+                        'total_plays': song_stats.total_plays,
+                        'total_correct_guesses': song_stats.total_correct_guesses
+                    }
+        
+        # Get all-time user stats for bar chart
+        all_user_stats = UserStats.query.filter_by(user_id=user_id).all()
+        points_distribution = {}
+        
+        for stat in all_user_stats:
+            if stat.correct_guess:
+                score = max(0, 7 - stat.difficulty_level)
+                points_distribution[score] = points_distribution.get(score, 0) + 1
+        
+        # Calculate max count for bar chart scaling
+        max_count = max(points_distribution.values()) if points_distribution else 1
+        
+        individual_stats = {
+            'points_distribution': points_distribution,
+            'max_count': max_count
+        }
+        
+        return {
+            'has_played_current': has_played_current,
+            'song_stats': current_song_stats or {'average_score': 0.0},
+            'individual_stats': individual_stats
+        }
     
     @staticmethod
     def update_user_stats(user_id, song_id, final_score, is_correct, difficulty_level):
@@ -102,6 +155,7 @@ class StatsService:
                 )
                 db.session.add(new_stat)
             
+            get_stats_cache().invalidate(user_stats_name(user_id))
             db.session.commit()
             
             # Update global song stats
@@ -152,6 +206,7 @@ class StatsService:
                 total_correct = sum(points_dist.values())
                 song_stats.average_score = total_score / total_correct if total_correct > 0 else 0.0
             
+            get_stats_cache().invalidate(song_stats_name(song_id))
             db.session.commit()
             
         except Exception as e:
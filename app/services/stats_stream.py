@@ -0,0 +1,166 @@
+"""
+Live song statistics for /stats/stream (server-sent events)
+
+Each worker process runs one poller thread while it has listeners. Every STATS_STREAM_INTERVAL
+seconds it reads the song_stats:<id> counter (see stats_cache) of each song being watched, and
+only when a counter moved does it load that song's stats and wake the song's listeners. Guesses
+recorded by any worker are therefore picked up by all of them, bursts of guesses are coalesced
+into one update per interval, and the database cost does not grow with the number of listeners.
+A listener only waits on a shared condition and compares the new stats with what it last sent.
+The poller also reads the GameState version; when it moves (a song was activated) every open
+stream is told the song changed and ends.
+"""
+
+import json
+import threading
+import time
+from flask import current_app
+from app import db
+from app.models import CacheVersion, GameState
+from app.services.stats_cache import song_stats_name
+
+class _SongChannel:
+    """Latest stats of one song and how many connections are listening to it"""
+
+    def __init__(self):
+        self.listeners = 0
+        self.version = None
+        self.sequence = 0
+        self.stats = None
+
+class StatsBroadcaster:
+    """Fans song stats updates out to every stream connection of this process"""
+
+    def __init__(self, app, interval):
+        self.app = app
+        self.interval = interval
+        self._channels = {}
+        self._condition = threading.Condition()
+        self._poller = None
+        self._game_version = None
+        self.generation = 0  # bumped whenever the poller sees the GameState version move
+
+    def subscribe(self, song_id):
+        """
+        Start listening to a song; returns (sequence, stats, generation): the channel's current
+        sequence and stats (None until first polled), so a new connection only waits for newer ones
+        """
+        with self._condition:
+            channel = self._channels.setdefault(song_id, _SongChannel())
+            channel.listeners += 1
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, name='stats-broadcaster', daemon=True)
+                self._poller.start()
+            return channel.sequence, channel.stats, self.generation
+
+    def unsubscribe(self, song_id):
+        with self._condition:
+            channel = self._channels.get(song_id)
+            if channel:
+                channel.listeners -= 1
+                if channel.listeners <= 0:
+                    del self._channels[song_id]
+
+    def wait(self, song_id, seen, generation, timeout):
+        """
+        (sequence, stats) once the song's stats are newer than sequence seen, or None after timeout
+        or as soon as the generation is no longer the one given
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self.generation != generation:
+                    return None
+                channel = self._channels.get(song_id)
+                if channel and channel.sequence > seen:
+                    return channel.sequence, channel.stats
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def _poll(self):
+        from app.services.stats_service import StatsService
+
+        while True:
+            with self._condition:
+                watched = {song_id: channel.version for song_id, channel in self._channels.items()}
+                if not watched:
+                    # A song activated while nobody listens is not a change for the next listener
+                    self._poller = None
+                    self._game_version = None
+                    return
+
+            updates = {}
+            game_version = self._game_version
+            try:
+                with self.app.app_context():
+                    game_version = db.session.query(GameState.version).filter_by(id=GameState.ROW_ID).scalar() or 0
+                    for song_id, known in watched.items():
+                        version = CacheVersion.current(song_stats_name(song_id))
+                        if version != known:
+                            updates[song_id] = (version, StatsService.load_song_stats(song_id))
+            except Exception as e:
+                self.app.logger.error(f"Stats broadcaster poll failed: {e}")
+
+            with self._condition:
+                game_changed = self._game_version is not None and game_version != self._game_version
+                self._game_version = game_version
+                if game_changed:
+                    self.generation += 1
+                for song_id, (version, stats) in updates.items():
+                    channel = self._channels.get(song_id)
+                    if channel:
+                        channel.version, channel.stats = version, stats
+                        channel.sequence += 1
+                if updates or game_changed:
+                    self._condition.notify_all()
+            time.sleep(self.interval)
+
+def format_event(event, data, event_id=None):
+    """One server-sent event"""
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+def stream_song_stats(broadcaster, song_id, initial, max_seconds, keepalive=15):
+    """
+    Server-sent events for one connection: a snapshot of the song's stats, then a delta with only
+    the changed fields whenever they change, and a comment every keepalive seconds. Ends after
+    max_seconds so long-lived connections are recycled; EventSource reconnects on its own.
+    When another song is activated it sends song_changed and ends (the page is for the old song).
+    Each open stream holds a server worker thread for up to max_seconds.
+    """
+    seen, latest, generation = broadcaster.subscribe(song_id)
+    try:
+        sent = dict(latest if latest is not None else initial)
+        yield 'retry: 3000\n\n'
+        yield format_event('snapshot', dict(sent, song_id=song_id))
+        end = time.monotonic() + max_seconds
+        while time.monotonic() < end:
+            update = broadcaster.wait(song_id, seen, generation,
+                                      min(keepalive, max(end - time.monotonic(), 0)))
+            if broadcaster.generation != generation:
+                yield format_event('song_changed', {'song_id': song_id})
+                return
+            if update is None:
+                yield ': keepalive\n\n'
+                continue
+            seen, stats = update
+            delta = {key: value for key, value in stats.items() if sent.get(key) != value}
+            if delta:
+                sent.update(delta)
+                yield format_event('delta', delta, seen)
+    finally:
+        broadcaster.unsubscribe(song_id)
+
+def get_stats_broadcaster():
+    """The current app's stats broadcaster, created on first use"""
+    broadcaster = current_app.extensions.get('stats_broadcaster')
+    if broadcaster is None:
+        broadcaster = current_app.extensions.setdefault('stats_broadcaster', StatsBroadcaster(
+            current_app._get_current_object(), current_app.config['STATS_STREAM_INTERVAL']
+        ))
+    return broadcaster
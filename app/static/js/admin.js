@@ -225,8 +225,9 @@ document.addEventListener('DOMContentLoaded', function() {
         
         progressSection.style.display = 'block';
         progressBar.style.width = '0%';
-        progressText.textContent = 'Starting download...';
-        progressDetails.textContent = `Downloading "${track.name}" by ${track.artist} from YouTube...`;
+        progressBar.style.background = '';
+        progressText.textContent = 'Queueing...';
+        progressDetails.textContent = `Queueing "${track.name}" by ${track.artist} for processing...`;
         
         // Disable the process button (Spotify flow uses #processSongBtn, not per-track onclick buttons)
         const processBtn = document.getElementById('processSongBtn');
@@ -235,39 +236,63 @@ document.addEventListener('DOMContentLoaded', function() {
             processBtn.textContent = 'Processing...';
         }
         
-        // Simulate progress updates
-        let progress = 0;
-        const frequencies = [500, 1000, 1500, 2000, 2500, 3500, 5000, 7500];
-        let currentFreqIndex = 0;
-        
-        const progressInterval = setInterval(() => {
-            progress += Math.random() * 12;
-            if (progress > 90) progress = 90; // Cap at 90% until completion
-            progressBar.style.width = progress + '%';
-            
-            if (progress < 20) {
-                progressText.textContent = 'Downloading audio...';
-                progressDetails.textContent = 'Fetching audio from YouTube...';
-            } else if (progress < 40) {
-                progressText.textContent = 'Extracting segment...';
-                progressDetails.textContent = `Extracting ${startTime}s - ${endTime}s segment...`;
-            } else if (progress < 90) {
-                // Show which frequency is being generated
-                if (currentFreqIndex < frequencies.length) {
-                    const currentFreq = frequencies[currentFreqIndex];
-                    progressText.textContent = `Generating ${currentFreq} frequencies...`;
-                    progressDetails.textContent = `Processing frequency reconstruction (${currentFreqIndex + 1}/${frequencies.length})`;
-                    
-                    // Move to next frequency every few seconds
-                    if (progress > 40 + (currentFreqIndex * 7)) {
-                        currentFreqIndex++;
-                    }
-                } else {
-                    progressText.textContent = 'Finalizing...';
-                    progressDetails.textContent = 'Completing frequency reconstructions...';
-                }
+        function resetProcessButton() {
+            if (processBtn) {
+                processBtn.disabled = false;
+                processBtn.textContent = 'Process';
             }
-        }, 1000);
+        }
+
+        function showError(message) {
+            progressText.textContent = 'Error!';
+            progressDetails.textContent = message;
+            progressBar.style.background = '#dc3545';
+            resetProcessButton();
+        }
+
+        // Processing runs in the ingest worker; poll the job until it finishes
+        function pollJob(jobId) {
+            fetch(`/admin/ingest_status/${jobId}`)
+                .then(response => response.json())
+                .then(data => {
+                    if (!data.success) {
+                        showError(data.error || 'Could not read job status');
+                        return;
+                    }
+
+                    const job = data.job;
+                    progressBar.style.width = job.progress + '%';
+                    progressDetails.textContent = job.message || '';
+
+                    if (!job.finished) {
+                        progressText.textContent = job.status === 'queued' ? 'Queued...' : 'Processing...';
+                        setTimeout(() => pollJob(jobId), 1500);
+                        return;
+                    }
+
+                    if (job.status === 'completed') {
+                        progressBar.style.width = '100%';
+                        progressText.textContent = 'Complete!';
+                        resetProcessButton();
+
+                        // Hide progress after 3 seconds
+                        setTimeout(() => {
+                            progressSection.style.display = 'none';
+                        }, 3000);
+
+                        // Refresh the page to show the new song
+                        setTimeout(() => {
+                            window.location.reload();
+                        }, 2000);
+                    } else {
+                        showError(job.error || job.message || 'Processing failed');
+                    }
+                })
+                .catch(error => {
+                    console.error('Error:', error);
+                    showError('Network error occurred');
+                });
+        }
         
         fetch('/admin/process_spotify_song', {
             method: 'POST',
@@ -286,46 +311,16 @@ document.addEventListener('DOMContentLoaded', function() {
         })
         .then(response => response.json())
         .then(data => {
-            clearInterval(progressInterval);
-            
             if (data.success) {
-                progressBar.style.width = '100%';
-                progressText.textContent = 'Complete!';
+                progressText.textContent = 'Queued...';
                 progressDetails.textContent = data.message;
-                
-                // Hide progress after 3 seconds
-                setTimeout(() => {
-                    progressSection.style.display = 'none';
-                }, 3000);
-                
-                // Refresh the page to show the new song
-                setTimeout(() => {
-                    window.location.reload();
-                }, 2000);
+                pollJob(data.job_id);
             } else {
-                progressText.textContent = 'Error!';
-                progressDetails.textContent = data.error || 'Processing failed';
-                progressBar.style.background = '#dc3545';
-            }
-            
-            // Re-enable the process button
-            if (processBtn) {
-                processBtn.disabled = false;
-                processBtn.textContent = 'Process';
+                showError(data.error || 'Processing failed');
             }
         })
         .catch(error => {
-            clearInterval(progressInterval);
-            progressText.textContent = 'Error!';
-            progressDetails.textContent = 'Network error occurred';
-            progressBar.style.background = '#dc3545';
-            
-            // Re-enable the process button
-            if (processBtn) {
-                processBtn.disabled = false;
-                processBtn.textContent = 'Process';
-            }
-            
+            showError('Network error occurred');
             console.error('Error:', error);
         });
     }
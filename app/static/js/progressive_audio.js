@@ -0,0 +1,77 @@
+// Progressive tier delivery
+// The first tier is fetched once; each later tier fetches only the residual it adds to the
+// previous one. Residuals are decoded and summed into an AudioBuffer (see tier_loader.js).
+document.addEventListener('DOMContentLoaded', function() {
+    const manifestUrl = window.progressiveManifestUrl;
+    if (!manifestUrl) return;
+
+    let manifest = null;
+    let decodeContext = null;
+    const residuals = {};   // tier index -> Promise of Float32Array
+    const sums = {};        // tier index -> Promise of Float32Array (residuals 0..index summed)
+
+    function decodeAudio(data) {
+        // Callback form also works on older Safari
+        return new Promise((resolve, reject) => decodeContext.decodeAudioData(data, resolve, reject));
+    }
+
+    function fetchResidual(index) {
+        if (!residuals[index]) {
+            residuals[index] = fetch(manifest.urls[index])
+                .then(resp => {
+                    if (!resp.ok) throw new Error('Residual request failed: ' + resp.status);
+                    return resp.arrayBuffer();
+                })
+                .then(decodeAudio)
+                .then(buffer => buffer.getChannelData(0));
+        }
+        return residuals[index];
+    }
+
+    function tierSum(index) {
+        if (!sums[index]) {
+            // Requests for every missing residual go out at once; summing waits for all of them
+            const previous = index > 0 ? tierSum(index - 1) : Promise.resolve(null);
+            sums[index] = Promise.all([previous, fetchResidual(index)]).then(([prev, residual]) => {
+                if (!prev) return residual;
+                const sum = new Float32Array(residual.length);
+                const shared = Math.min(prev.length, residual.length);
+                for (let i = 0; i < shared; i++) {
+                    sum[i] = prev[i] + residual[i];
+                }
+                return sum;
+            });
+        }
+        return sums[index];
+    }
+
+    function renderTier(level) {
+        const index = manifest.levels.indexOf(level);
+        if (index < 0) return Promise.reject(new Error('No residual for tier ' + level));
+
+        return tierSum(index).then(sum => {
+            const buffer = decodeContext.createBuffer(1, sum.length, decodeContext.sampleRate);
+            const channel = buffer.getChannelData(0);
+            const gain = manifest.gains[index];
+            for (let i = 0; i < sum.length; i++) {
+                channel[i] = sum[i] * gain;
+            }
+            return { samples: channel, sampleRate: buffer.sampleRate };
+        });
+    }
+
+    const OfflineContext = window.OfflineAudioContext || window.webkitOfflineAudioContext;
+    const manifestRequest = OfflineContext
+        ? fetch(manifestUrl).then(resp => resp.json())
+        : Promise.reject(new Error('Web Audio not supported'));
+
+    manifestRequest
+        .then(data => {
+            if (!data.success) throw new Error(data.error || 'No progressive manifest');
+            manifest = data;
+            // Decoding at the clip's own rate keeps residual samples aligned without resampling
+            decodeContext = new OfflineContext(1, 1, manifest.sample_rate);
+            TierLoader.watchTiers(renderTier);
+        })
+        .catch(TierLoader.useFallbackForAll);
+});
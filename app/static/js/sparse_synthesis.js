@@ -0,0 +1,184 @@
+// Client-side tier synthesis
+// Downloads the song's ranked sparse coefficients once (/coefficients/<song>.<digest>.bin) and
+// runs the inverse FFT in the browser for every tier, mirroring audio/spectral_layers.py:
+// a tier keeps the loudest bins until it covers `level` two-sided coefficients, then is
+// peak-normalized. The transform length n may be padded past the clip (payload version 2+ carries
+// the clip length to trim to). n is rarely a power of two, so the inverse DFT uses Bluestein's
+// algorithm on power-of-two FFTs.
+window.SparseSynthesis = (function() {
+    const PAYLOAD_MAGIC = 'FLCO';
+    const HEADER_BYTES_V1 = 20;
+    const HEADER_BYTES = 24;   // version 2 adds the clip length
+
+    function parsePayload(buffer) {
+        const view = new DataView(buffer);
+        const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+        if (magic !== PAYLOAD_MAGIC) throw new Error('Not a coefficient payload');
+        const version = view.getUint16(4, true);
+        const n = view.getUint32(8, true);
+        const sampleRate = view.getUint32(12, true);
+        const count = view.getUint32(16, true);
+        const headerBytes = version >= 2 ? HEADER_BYTES : HEADER_BYTES_V1;
+        return {
+            n: n,
+            length: version >= 2 ? view.getUint32(20, true) : n,
+            sampleRate: sampleRate,
+            bins: new Uint32Array(buffer, headerBytes, count),
+            values: new Float32Array(buffer, headerBytes + count * 4, count * 2)   // (re, im) pairs
+        };
+    }
+
+    // Ranked bins needed for a tier: a bin counts twice (its conjugate mirror) except DC and Nyquist
+    function tierSize(payload, level) {
+        let covered = 0;
+        for (let i = 0; i < payload.bins.length; i++) {
+            const bin = payload.bins[i];
+            covered += (bin === 0 || 2 * bin === payload.n) ? 1 : 2;
+            if (covered >= level) return i + 1;
+        }
+        return payload.bins.length;
+    }
+
+    // In-place iterative radix-2 FFT (forward) on separate real/imaginary arrays
+    function makeFft(size) {
+        const levels = Math.log2(size);
+        const reverse = new Uint32Array(size);
+        for (let i = 0; i < size; i++) {
+            let r = 0;
+            for (let bit = 0, v = i; bit < levels; bit++, v >>= 1) r = (r << 1) | (v & 1);
+            reverse[i] = r;
+        }
+        const cosTable = new Float64Array(size / 2);
+        const sinTable = new Float64Array(size / 2);
+        for (let i = 0; i < size / 2; i++) {
+            cosTable[i] = Math.cos(2 * Math.PI * i / size);
+            sinTable[i] = -Math.sin(2 * Math.PI * i / size);
+        }
+
+        return function fft(re, im) {
+            for (let i = 0; i < size; i++) {
+                const j = reverse[i];
+                if (j > i) {
+                    let t = re[i]; re[i] = re[j]; re[j] = t;
+                    t = im[i]; im[i] = im[j]; im[j] = t;
+                }
+            }
+            for (let half = 1; half < size; half *= 2) {
+                const step = size / (half * 2);
+                for (let start = 0; start < size; start += half * 2) {
+                    for (let k = 0; k < half; k++) {
+                        const a = start + k;
+                        const b = a + half;
+                        const wr = cosTable[k * step];
+                        const wi = sinTable[k * step];
+                        const tr = re[b] * wr - im[b] * wi;
+                        const ti = re[b] * wi + im[b] * wr;
+                        re[b] = re[a] - tr; im[b] = im[a] - ti;
+                        re[a] += tr; im[a] += ti;
+                    }
+                }
+            }
+        };
+    }
+
+    // Inverse real DFT of length n for sparse Hermitian spectra, via Bluestein's chirp-z transform.
+    // The chirp filter's FFT only depends on n, so it is built once and reused for every tier.
+    function makeInverseTransform(n) {
+        let size = 1;
+        while (size < 2 * n - 1) size *= 2;
+        const fft = makeFft(size);
+
+        // chirp[k] = exp(i*pi*k^2/n); k^2 is reduced mod 2n first to keep the angle exact
+        const chirpRe = new Float64Array(n);
+        const chirpIm = new Float64Array(n);
+        for (let k = 0; k < n; k++) {
+            const angle = Math.PI * ((k * k) % (2 * n)) / n;
+            chirpRe[k] = Math.cos(angle);
+            chirpIm[k] = Math.sin(angle);
+        }
+        const filterRe = new Float64Array(size);
+        const filterIm = new Float64Array(size);
+        filterRe[0] = chirpRe[0]; filterIm[0] = -chirpIm[0];
+        for (let k = 1; k < n; k++) {
+            filterRe[k] = filterRe[size - k] = chirpRe[k];
+            filterIm[k] = filterIm[size - k] = -chirpIm[k];
+        }
+        fft(filterRe, filterIm);
+
+        return function inverse(bins, values, count) {
+            const re = new Float64Array(size);
+            const im = new Float64Array(size);
+            const place = (k, xr, xi) => {
+                re[k] = xr * chirpRe[k] - xi * chirpIm[k];
+                im[k] = xr * chirpIm[k] + xi * chirpRe[k];
+            };
+            for (let i = 0; i < count; i++) {
+                const k = bins[i];
+                const xr = values[2 * i];
+                const xi = values[2 * i + 1];
+                place(k, xr, xi);
+                if (k !== 0 && 2 * k !== n) place(n - k, xr, -xi);   // conjugate mirror
+            }
+
+            // Convolve with the chirp filter: multiply spectra, then inverse FFT by conjugation
+            fft(re, im);
+            for (let i = 0; i < size; i++) {
+                const r = re[i] * filterRe[i] - im[i] * filterIm[i];
+                const m = re[i] * filterIm[i] + im[i] * filterRe[i];
+                re[i] = r;
+                im[i] = -m;
+            }
+            fft(re, im);
+
+            const out = new Float32Array(n);
+            for (let t = 0; t < n; t++) {
+                // Undo the conjugation (scale by 1/size), apply the output chirp, keep the real part
+                const cr = re[t] / size;
+                const ci = -im[t] / size;
+                out[t] = (cr * chirpRe[t] - ci * chirpIm[t]) / n;
+            }
+            return out;
+        };
+    }
+
+    function normalize(samples) {
+        let peak = 0;
+        for (let i = 0; i < samples.length; i++) peak = Math.max(peak, Math.abs(samples[i]));
+        if (peak > 0) {
+            for (let i = 0; i < samples.length; i++) samples[i] /= peak;
+        }
+        return samples;
+    }
+
+    function createSynthesizer(payload) {
+        const inverse = makeInverseTransform(payload.n);
+        return function renderTier(level) {
+            const count = tierSize(payload, level);
+            return normalize(inverse(payload.bins, payload.values, count).subarray(0, payload.length));
+        };
+    }
+
+    return { parsePayload, tierSize, createSynthesizer };
+})();
+
+if (typeof document !== 'undefined') {
+    document.addEventListener('DOMContentLoaded', function() {
+        const coefficientsUrl = window.coefficientsUrl;
+        if (!coefficientsUrl) return;
+
+        fetch(coefficientsUrl)
+            .then(resp => {
+                if (!resp.ok) throw new Error('Coefficient request failed: ' + resp.status);
+                return resp.arrayBuffer();
+            })
+            .then(buffer => {
+                const payload = SparseSynthesis.parsePayload(buffer);
+                const renderTier = SparseSynthesis.createSynthesizer(payload);
+                TierLoader.watchTiers(level => new Promise(resolve => {
+                    // Yield to the page between tiers so reveals stay responsive
+                    setTimeout(() => resolve({ samples: renderTier(level), sampleRate: payload.sampleRate }), 0);
+                }));
+            })
+            .catch(TierLoader.useFallbackForAll);
+    });
+}
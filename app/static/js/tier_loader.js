@@ -0,0 +1,80 @@
+// Shared helpers for tiers built in the browser (progressive_audio.js, sparse_synthesis.js)
+// Tier <audio> elements carry data-tier-frequency and data-fallback-src instead of <source> tags;
+// a loader renders each tier's samples and hands them over as a WAV blob, so the custom
+// players in user.js work unchanged.
+window.TierLoader = (function() {
+    function samplesToWavBlob(samples, sampleRate) {
+        const view = new DataView(new ArrayBuffer(44 + samples.length * 2));
+        const writeString = (offset, text) => {
+            for (let i = 0; i < text.length; i++) view.setUint8(offset + i, text.charCodeAt(i));
+        };
+        writeString(0, 'RIFF');
+        view.setUint32(4, 36 + samples.length * 2, true);
+        writeString(8, 'WAVE');
+        writeString(12, 'fmt ');
+        view.setUint32(16, 16, true);
+        view.setUint16(20, 1, true);                   // PCM
+        view.setUint16(22, 1, true);                   // mono
+        view.setUint32(24, sampleRate, true);
+        view.setUint32(28, sampleRate * 2, true);      // byte rate
+        view.setUint16(32, 2, true);                   // block align
+        view.setUint16(34, 16, true);                  // bits per sample
+        writeString(36, 'data');
+        view.setUint32(40, samples.length * 2, true);
+        for (let i = 0; i < samples.length; i++) {
+            const s = Math.max(-1, Math.min(1, samples[i]));
+            view.setInt16(44 + i * 2, s < 0 ? s * 0x8000 : s * 0x7FFF, true);
+        }
+        return new Blob([view], { type: 'audio/wav' });
+    }
+
+    function tierAudios() {
+        return Array.from(document.querySelectorAll('audio[data-tier-frequency]'));
+    }
+
+    function useFallback(audio) {
+        if (!audio.getAttribute('src')) {
+            audio.src = audio.dataset.fallbackSrc;
+        }
+    }
+
+    function useFallbackForAll(error) {
+        console.error('Building tiers in the browser failed, fetching full tiers instead:', error);
+        tierAudios().forEach(useFallback);
+    }
+
+    // Calls renderTier(level) -> Promise of {samples, sampleRate} for each tier once its player is shown
+    function watchTiers(renderTier) {
+        function loadTier(audio) {
+            if (audio.dataset.tierState) return;
+            audio.dataset.tierState = 'loading';
+            renderTier(parseInt(audio.dataset.tierFrequency, 10))
+                .then(tier => {
+                    audio.src = URL.createObjectURL(samplesToWavBlob(tier.samples, tier.sampleRate));
+                    audio.dataset.tierState = 'ready';
+                })
+                .catch(error => {
+                    console.error('Tier ' + audio.dataset.tierFrequency + ' failed, fetching it whole:', error);
+                    useFallback(audio);
+                });
+        }
+
+        function loadVisibleTiers() {
+            tierAudios().forEach(audio => {
+                const player = audio.closest('.audio-player');
+                if (!player || player.style.display !== 'none') {
+                    loadTier(audio);
+                }
+            });
+        }
+
+        loadVisibleTiers();
+        // Tiers are revealed by showing their player; load each one as it appears
+        const observer = new MutationObserver(loadVisibleTiers);
+        document.querySelectorAll('.audio-player').forEach(player => {
+            observer.observe(player, { attributes: true, attributeFilter: ['style'] });
+        });
+    }
+
+    return { samplesToWavBlob, watchTiers, useFallbackForAll };
+})();
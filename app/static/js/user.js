@@ -397,6 +397,31 @@ document.addEventListener('DOMContentLoaded', function() {
     // Check on page load
     checkIfAlreadyPlayed();
 
+    // Live global stats for the current song: the server pushes a snapshot, then only changed
+    // fields, so the page never has to poll /current_stats for them
+    function subscribeToLiveStats() {
+        if (!window.EventSource || !window.statsStreamUrl) return;
+        const liveStats = {};
+        const source = new EventSource(window.statsStreamUrl);
+        const apply = (event) => {
+            Object.assign(liveStats, JSON.parse(event.data));
+            const avgScoreElem = document.querySelector('.average-score-value');
+            if (avgScoreElem && liveStats.average_score !== undefined) {
+                avgScoreElem.textContent = liveStats.average_score.toFixed(1);
+            }
+            const playsElem = document.querySelector('.total-plays-value');
+            if (playsElem && liveStats.total_plays !== undefined) {
+                playsElem.textContent = liveStats.total_plays;
+            }
+        };
+        source.addEventListener('snapshot', apply);
+        source.addEventListener('delta', apply);
+        // Another song was activated: these stats no longer belong to the page
+        source.addEventListener('song_changed', () => source.close());
+    }
+
+    subscribeToLiveStats();
+
     guessForm.addEventListener('submit', async function(e) {
         e.preventDefault();
         console.log('Form submitted');
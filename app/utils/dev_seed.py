@@ -11,8 +11,9 @@ import soundfile as sf
 from flask import current_app
 
 from app import db
-from app.models import Song
+from app.models import GameState, Song
 from app.models.user import AdminUser
+from app.services.playback_service import PlaybackService
 
 DEFAULT_ADMIN_USERNAME = 'admin'
 DEFAULT_ADMIN_PASSWORD = 'MadJax195'
@@ -100,15 +101,14 @@ def _pick_newest_db_song_with_files() -> Song | None:
 
 
 def _set_only_active(song: Song) -> None:
-    for s in Song.query.all():
-        s.is_active = False
-    song.is_active = True
+    db.session.flush()  # a new song needs its id
+    PlaybackService.activate(song.id)
 
 
 def _write_demo_frequency_wavs(song_dir: Path, levels: list) -> None:
     """Write short mono PCM_16 WAVs (browser-friendly); always overwrites."""
     song_dir.mkdir(parents=True, exist_ok=True)
-    sr = int(current_app.config['AUDIO_SAMPLE_RATE'])
+    sr = int(current_app.config['AUDIO_SAMPLE_RATE']) or 44100
     duration = min(int(current_app.config['AUDIO_DURATION']), 30)
     n = int(sr * duration)
     t = np.linspace(0, duration, n, endpoint=False)
@@ -128,7 +128,8 @@ def ensure_default_song_works() -> None:
     levels = list(current_app.config['FREQUENCY_LEVELS'])
     out_root = Path(current_app.config['AUDIO_OUTPUT_FOLDER'])
 
-    active = Song.query.filter_by(is_active=True).first()
+    state = GameState.current()
+    active = state.active_song if state else None
     if active and _song_has_playable_files(active):
         # If DemoSong is active but a real download exists, prefer the download.
         if active.base_filename == DEMO_SONG_BASE:
@@ -138,7 +139,7 @@ def ensure_default_song_works() -> None:
         return
 
     if active:
-        active.is_active = False
+        PlaybackService.activate(None)
 
     picked = _pick_newest_db_song_with_files()
     if picked:
@@ -159,7 +160,6 @@ def ensure_default_song_works() -> None:
                 album=None,
                 base_filename=chosen_folder,
                 has_frequency_versions=True,
-                is_active=False,
             )
             db.session.add(song)
             db.session.flush()
@@ -179,7 +179,6 @@ def ensure_default_song_works() -> None:
             album=None,
             base_filename=chosen,
             has_frequency_versions=True,
-            is_active=False,
         )
         db.session.add(song)
     else:
@@ -1,25 +1,161 @@
-import wave
+"""
+Memory-mapped WAV reading.
+
+The data chunk is mapped instead of read, so opening a file costs nothing and only the
+frames of the requested window (and channel) are ever converted to float32.
+Supports 8/16/24/32-bit PCM, 32/64-bit float and WAVE_FORMAT_EXTENSIBLE files.
+"""
+
+import mmap
+import struct
 
 import numpy as np
 import soundfile as sf
 
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_IEEE_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# (format tag, bits per sample) -> little-endian sample dtype; 24-bit is unpacked by hand
+_SAMPLE_DTYPES = {
+    (_WAVE_FORMAT_PCM, 8): np.dtype('u1'),
+    (_WAVE_FORMAT_PCM, 16): np.dtype('<i2'),
+    (_WAVE_FORMAT_PCM, 24): np.dtype(('u1', 3)),
+    (_WAVE_FORMAT_PCM, 32): np.dtype('<i4'),
+    (_WAVE_FORMAT_IEEE_FLOAT, 32): np.dtype('<f4'),
+    (_WAVE_FORMAT_IEEE_FLOAT, 64): np.dtype('<f8'),
+}
+
+
+def _parse_header(mapped, file_path):
+    """(format tag, channels, sample rate, bits, data offset, data size) of a mapped WAV"""
+    if mapped[:4] != b'RIFF' or mapped[8:12] != b'WAVE':
+        raise ValueError(f"Not a WAV file: {file_path}")
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(mapped):
+        chunk_id = mapped[offset:offset + 4]
+        chunk_size = struct.unpack('<I', mapped[offset + 4:offset + 8])[0]
+        body = offset + 8
+        if chunk_id == b'fmt ':
+            format_tag, channels, sample_rate = struct.unpack('<HHI', mapped[body:body + 8])
+            bits = struct.unpack('<H', mapped[body + 14:body + 16])[0]
+            if format_tag == _WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # The real format tag is the first two bytes of the SubFormat GUID
+                format_tag = struct.unpack('<H', mapped[body + 24:body + 26])[0]
+            fmt = (format_tag, channels, sample_rate, bits)
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise ValueError(f"WAV data chunk before fmt chunk: {file_path}")
+            # Streamed writers leave the size at 0 or 0xFFFFFFFF; the data then runs to the end
+            if chunk_size in (0, 0xFFFFFFFF) or body + chunk_size > len(mapped):
+                chunk_size = len(mapped) - body
+            return fmt + (body, chunk_size)
+        offset = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError(f"No audio data in WAV file: {file_path}")
+
+
+def _to_float32(samples, dtype):
+    """Convert raw samples of dtype (any shape; 24-bit has a trailing byte axis) to float32 in [-1, 1]"""
+    if dtype == np.dtype('u1'):
+        return (samples.astype(np.float32) - 128.0) / 128.0
+    if dtype == np.dtype('<i2'):
+        return samples.astype(np.float32) / 32768.0
+    if dtype == np.dtype('<i4'):
+        return (samples / 2147483648.0).astype(np.float32)
+    if dtype.kind == 'f':
+        return samples.astype(np.float32)
+    # 24-bit: assemble little-endian bytes into int32, shifted up so the sign extends
+    packed = samples.astype(np.int32)
+    values = (packed[..., 0] << 8) | (packed[..., 1] << 16) | (packed[..., 2] << 24)
+    return (values / 2147483648.0).astype(np.float32)
+
+
+class WavFile:
+    """
+    A WAV file with its data chunk memory-mapped
+
+    frames() returns zero-copy views of the raw samples; read() converts only the
+    requested window and channel to float32. Use as a context manager, or call close().
+    """
+
+    def __init__(self, file_path):
+        self.path = file_path
+        with open(file_path, 'rb') as f:
+            self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            format_tag, self.num_channels, self.sample_rate, self.bits, offset, size = \
+                _parse_header(self._mapped, file_path)
+            self._dtype = _SAMPLE_DTYPES.get((format_tag, self.bits))
+            if self._dtype is None:
+                raise ValueError(f"Unsupported WAV format {format_tag} with {self.bits} bits: {file_path}")
+            frame_bytes = self._dtype.itemsize * self.num_channels
+            self.num_frames = size // frame_bytes
+            self._raw = np.ndarray(
+                shape=(self.num_frames, self.num_channels), dtype=self._dtype,
+                buffer=self._mapped, offset=offset,
+            )
+        except Exception:
+            self._mapped.close()
+            raise
+
+    @property
+    def duration(self):
+        return self.num_frames / self.sample_rate
+
+    def frame_range(self, start_time=0, end_time=None):
+        """(start, stop) frame indices for a time window, clamped to the file"""
+        start = min(max(int(start_time * self.sample_rate), 0), self.num_frames)
+        stop = self.num_frames if end_time is None else int(end_time * self.sample_rate)
+        return start, min(max(stop, start), self.num_frames)
+
+    def frames(self, start=0, stop=None):
+        """Raw samples [start, stop) shaped (frames, channels) without copying; valid until close()"""
+        return self._raw[start:stop]
+
+    def read(self, start_time=0, end_time=None, channel='left'):
+        """
+        float32 samples of a time window, converted from the mapped data
+
+        channel is 'left' (first channel, the default: avoids phase cancellation), 'right',
+        'mix' (average of all channels) or 'all' (shaped (frames, channels)).
+        """
+        start, stop = self.frame_range(start_time, end_time)
+        window = self._raw[start:stop]
+        if channel == 'all':
+            return _to_float32(window, self._dtype)
+        if channel == 'mix':
+            return _to_float32(window, self._dtype).mean(axis=1, dtype=np.float32)
+        if channel not in ('left', 'right'):
+            raise ValueError(f"Unknown channel mode: {channel}. Expected left, right, mix or all")
+        index = 1 if channel == 'right' and self.num_channels > 1 else 0
+        return _to_float32(window[:, index], self._dtype)
+
+    def close(self):
+        self._raw = None
+        try:
+            self._mapped.close()
+        except BufferError:
+            pass  # a frames() view is still alive; the mapping closes when it is released
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
 
-def read_wav_file(file_path):
-    with wave.open(file_path, 'rb') as wav_file:
-        params = wav_file.getparams()
-        sample_rate = wav_file.getframerate()
-        num_channels = wav_file.getnchannels()
-        frames = wav_file.readframes(params.nframes)
-
-        data = np.frombuffer(frames, dtype=np.int16)
-        if num_channels == 2:
-            data = data.reshape(-1, 2)
-            # Use only left channel instead of averaging to avoid phase cancellation
-            data = data[:, 0]
-        
-        # Normalize the data
-        data = data.astype(np.float32) / 32768.0
-        return data, sample_rate, num_channels
+def read_wav_file(file_path, start_time=0, end_time=None, channel='left'):
+    """
+    Read a WAV file (or just start_time..end_time seconds of it) as float32 samples
+    Returns (data, sample_rate, num_channels), where num_channels is the file's channel count
+    """
+    with WavFile(file_path) as wav:
+        if start_time >= wav.duration > 0:
+            raise ValueError(f"Start time ({start_time}s) is beyond audio duration ({wav.duration:.2f}s)")
+        return wav.read(start_time, end_time, channel), wav.sample_rate, wav.num_channels
 
 
 def save_audio(audio_data, sample_rate, output_file):
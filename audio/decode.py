@@ -0,0 +1,108 @@
+"""
+In-memory audio decoding through an ffmpeg pipe.
+
+ffmpeg writes a float WAV stream to stdout and the samples are read straight into a
+NumPy array, so compressed inputs never round-trip through a temporary WAV file.
+"""
+
+import struct
+import subprocess
+
+import numpy as np
+
+# Which channel(s) decode_audio returns:
+#   left  - first channel only (default; avoids phase cancellation, as read_wav_file does)
+#   right - second channel, or the only channel of a mono source
+#   mix   - average of all channels
+#   all   - every channel, shaped (samples, channels)
+CHANNEL_MODES = ('left', 'right', 'mix', 'all')
+
+_WAVE_FORMAT_IEEE_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _parse_wav_stream(buffer):
+    """
+    Read (channels, sample_rate, data_offset) from a piped float32 WAV header.
+    The data chunk size is unknown when ffmpeg writes to a pipe, so the data runs to the end.
+    """
+    if buffer[:4] != b'RIFF' or buffer[8:12] != b'WAVE':
+        raise ValueError("ffmpeg did not produce a WAV stream")
+
+    channels = sample_rate = None
+    offset = 12
+    while offset + 8 <= len(buffer):
+        chunk_id = buffer[offset:offset + 4]
+        chunk_size = struct.unpack('<I', buffer[offset + 4:offset + 8])[0]
+        body = offset + 8
+        if chunk_id == b'fmt ':
+            format_tag, channels, sample_rate = struct.unpack('<HHI', buffer[body:body + 8])
+            bits = struct.unpack('<H', buffer[body + 14:body + 16])[0]
+            if format_tag not in (_WAVE_FORMAT_IEEE_FLOAT, _WAVE_FORMAT_EXTENSIBLE) or bits != 32:
+                raise ValueError(f"Unexpected WAV format from ffmpeg (tag {format_tag}, {bits} bits)")
+        elif chunk_id == b'data':
+            if channels is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            return channels, sample_rate, body
+        offset = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError("No audio data in ffmpeg output")
+
+
+def _select_channel(frames, channel):
+    if channel == 'all':
+        return frames
+    if channel == 'mix':
+        return frames.mean(axis=1, dtype=np.float32)
+    index = 1 if channel == 'right' and frames.shape[1] > 1 else 0
+    return np.ascontiguousarray(frames[:, index])
+
+
+def decode_audio(source, sample_rate=None, channel='left', start_time=0, end_time=None,
+                 seek_margin=1.0, http_headers=None, ffmpeg='ffmpeg'):
+    """
+    Decode source (file path or media URL) into float32 samples in [-1, 1]
+
+    sample_rate resamples when given; otherwise the source rate is kept.
+    start_time/end_time limit decoding to a window. ffmpeg seeks to seek_margin
+    seconds before the window and reads seek_margin past it, so over HTTP only
+    that range is fetched; the window itself is then cut sample-accurately.
+
+    Returns (data, sample_rate, num_channels), where num_channels is the source's channel count.
+    """
+    if channel not in CHANNEL_MODES:
+        raise ValueError(f"Unknown channel mode: {channel}. Expected one of {', '.join(CHANNEL_MODES)}")
+
+    cmd = [ffmpeg, '-nostdin', '-hide_banner', '-loglevel', 'error']
+    if http_headers:
+        cmd += ['-headers', ''.join(f"{key}: {value}\r\n" for key, value in http_headers.items())]
+
+    # Input options: coarse seek and read limit (window + margins)
+    seek = max(0.0, start_time - seek_margin)
+    if seek > 0:
+        cmd += ['-ss', f'{seek:.3f}']
+    if end_time is not None:
+        cmd += ['-t', f'{end_time + seek_margin - seek:.3f}']
+    cmd += ['-i', source, '-vn']
+
+    # Output options: exact trim inside the decoded margin
+    if start_time - seek > 0:
+        cmd += ['-ss', f'{start_time - seek:.3f}']
+    if end_time is not None:
+        cmd += ['-t', f'{end_time - start_time:.3f}']
+    if sample_rate:
+        cmd += ['-ar', str(int(sample_rate))]
+    cmd += ['-acodec', 'pcm_f32le', '-f', 'wav', 'pipe:1']
+
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise ValueError(f"ffmpeg could not decode {source}: {result.stderr.decode(errors='replace').strip()}")
+
+    num_channels, rate, data_offset = _parse_wav_stream(result.stdout)
+    usable = (len(result.stdout) - data_offset) // (4 * num_channels) * 4 * num_channels
+    frames = np.frombuffer(result.stdout, dtype='<f4', count=usable // 4, offset=data_offset)
+    if frames.size == 0:
+        raise ValueError(f"No audio in range {start_time}s to {end_time if end_time is not None else 'end'}s")
+
+    data = _select_channel(frames.reshape(-1, num_channels), channel)
+    return data, rate, num_channels
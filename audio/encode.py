@@ -0,0 +1,92 @@
+"""
+Encoding of reconstructed tiers to WAV and compressed formats.
+
+WAV, FLAC and Ogg Vorbis are written by soundfile. Opus is encoded by piping float
+samples through ffmpeg (libopus), because Opus only runs at 48 kHz and ffmpeg
+resamples on the way in.
+"""
+
+import io
+import subprocess
+
+import numpy as np
+import soundfile as sf
+
+# Tier formats: file extension -> MIME type used for <source type> and responses
+AUDIO_FORMATS = {
+    'opus': 'audio/ogg; codecs=opus',
+    'ogg': 'audio/ogg; codecs=vorbis',
+    'flac': 'audio/flac',
+    'wav': 'audio/wav',
+}
+
+# soundfile writes go in blocks: libsndfile's Vorbis encoder can crash on one very large write
+_WRITE_BLOCK = 1 << 16
+
+_SOUNDFILE_FORMATS = {
+    'wav': ('WAV', 'PCM_16'),
+    'flac': ('FLAC', 'PCM_16'),
+    'ogg': ('OGG', 'VORBIS'),
+}
+
+
+def _encode_opus(audio, sample_rate, bitrate, ffmpeg):
+    channels = 1 if audio.ndim == 1 else audio.shape[1]
+    cmd = [
+        ffmpeg, '-nostdin', '-hide_banner', '-loglevel', 'error',
+        '-f', 'f32le', '-ar', str(int(sample_rate)), '-ac', str(channels), '-i', 'pipe:0',
+        '-c:a', 'libopus', '-b:a', bitrate, '-f', 'ogg', 'pipe:1',
+    ]
+    samples = np.ascontiguousarray(audio, dtype='<f4').tobytes()
+    result = subprocess.run(cmd, input=samples, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0 or not result.stdout:
+        raise ValueError(f"ffmpeg could not encode Opus: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
+
+
+def encode_audio(audio, sample_rate, fmt, opus_bitrate='48k', ffmpeg='ffmpeg'):
+    """Encode float samples in [-1, 1] as fmt (a key of AUDIO_FORMATS); returns the file bytes"""
+    if fmt not in AUDIO_FORMATS:
+        raise ValueError(f"Unknown audio format: {fmt}. Expected one of {', '.join(AUDIO_FORMATS)}")
+
+    if fmt == 'opus':
+        return _encode_opus(audio, sample_rate, opus_bitrate, ffmpeg)
+
+    container, subtype = _SOUNDFILE_FORMATS[fmt]
+    channels = 1 if audio.ndim == 1 else audio.shape[1]
+    buffer = io.BytesIO()
+    with sf.SoundFile(buffer, 'w', samplerate=sample_rate, channels=channels,
+                      format=container, subtype=subtype) as output:
+        for start in range(0, len(audio), _WRITE_BLOCK):
+            output.write(audio[start:start + _WRITE_BLOCK])
+    return buffer.getvalue()
+
+
+def write_audio(audio, sample_rate, output_file, fmt, opus_bitrate='48k', ffmpeg='ffmpeg'):
+    """Encode with encode_audio and write the result to output_file"""
+    data = encode_audio(audio, sample_rate, fmt, opus_bitrate, ffmpeg)
+    with open(output_file, 'wb') as f:
+        f.write(data)
+
+
+def transcode_file(wav_path, output_file, fmt, opus_bitrate='48k', ffmpeg='ffmpeg', block_size=_WRITE_BLOCK):
+    """Encode an existing WAV file as fmt a block at a time, without loading it whole"""
+    if fmt not in AUDIO_FORMATS:
+        raise ValueError(f"Unknown audio format: {fmt}. Expected one of {', '.join(AUDIO_FORMATS)}")
+
+    if fmt == 'opus':
+        cmd = [
+            ffmpeg, '-nostdin', '-hide_banner', '-loglevel', 'error', '-y', '-i', wav_path,
+            '-c:a', 'libopus', '-b:a', opus_bitrate, '-f', 'ogg', output_file,
+        ]
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise ValueError(f"ffmpeg could not encode Opus: {result.stderr.decode(errors='replace').strip()}")
+        return
+
+    container, subtype = _SOUNDFILE_FORMATS[fmt]
+    with sf.SoundFile(wav_path) as source:
+        with sf.SoundFile(output_file, 'w', samplerate=source.samplerate, channels=source.channels,
+                          format=container, subtype=subtype) as output:
+            for block in source.blocks(block_size, dtype='float32'):
+                output.write(block)
@@ -0,0 +1,118 @@
+"""
+FFT backend for the spectral engines (spectral_layers, stft_layers).
+
+numpy.fft always computes in double precision on one thread. scipy.fft, when installed,
+keeps float32 input in single precision and can split a transform across worker threads.
+With single precision selected the numpy backend still casts its results down, so
+spectra and tiers stay float32 / complex64 whichever backend runs.
+
+Clip lengths come from arbitrary start/end times and can land on sizes with large prime
+factors, which transform several times slower than nearby 2-3-5-smooth sizes.
+transform_length() picks the padded size to use; callers zero-pad to it and trim the
+inverse back to the clip length, so tiers keep their duration.
+
+configure() is called by create_app from FFT_BACKEND, FFT_WORKERS, FFT_PRECISION and
+FFT_FAST_LENGTH; scripts that do not create an app get the defaults below.
+"""
+
+import logging
+
+import numpy as np
+
+try:
+    import scipy.fft as _scipy_fft
+except ImportError:  # optional dependency
+    _scipy_fft = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('auto', 'numpy', 'scipy')
+PRECISIONS = ('single', 'double')
+
+_settings = {
+    'backend': 'scipy' if _scipy_fft is not None else 'numpy',
+    'workers': 1,
+    'precision': 'single',
+    'fast_length': True,
+}
+
+
+def configure(backend='auto', workers=1, precision='single', fast_length=True):
+    """Select the backend ('auto' = scipy if installed, else numpy), worker threads, precision and padding"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown FFT backend: {backend}. Expected one of {', '.join(BACKENDS)}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown FFT precision: {precision}. Expected one of {', '.join(PRECISIONS)}")
+    if backend == 'scipy' and _scipy_fft is None:
+        raise ValueError("FFT backend 'scipy' requested but scipy is not installed")
+    if backend == 'auto':
+        backend = 'scipy' if _scipy_fft is not None else 'numpy'
+    if int(workers) > 1 and backend != 'scipy':
+        logger.warning(f"FFT workers={workers} has no effect with the {backend} backend; "
+                       f"install scipy (optional) to split transforms across threads")
+
+    _settings.update(backend=backend, workers=int(workers), precision=precision, fast_length=bool(fast_length))
+
+
+def settings():
+    """Copy of the active settings"""
+    return dict(_settings)
+
+
+def _real_dtype():
+    return np.float32 if _settings['precision'] == 'single' else np.float64
+
+
+def _complex_dtype():
+    return np.complex64 if _settings['precision'] == 'single' else np.complex128
+
+
+def rfft(data, n=None, axis=-1):
+    """Real FFT of data, zero-padded (or cropped) to n along axis"""
+    data = np.asarray(data, dtype=_real_dtype())
+    if _settings['backend'] == 'scipy':
+        return _scipy_fft.rfft(data, n=n, axis=axis, workers=_settings['workers'])
+    return np.fft.rfft(data, n=n, axis=axis).astype(_complex_dtype(), copy=False)
+
+
+def irfft(spectrum, n=None, axis=-1):
+    """Inverse real FFT of spectrum with n output samples along axis"""
+    spectrum = np.asarray(spectrum, dtype=_complex_dtype())
+    if _settings['backend'] == 'scipy':
+        return _scipy_fft.irfft(spectrum, n=n, axis=axis, workers=_settings['workers'])
+    return np.fft.irfft(spectrum, n=n, axis=axis).astype(_real_dtype(), copy=False)
+
+
+def ifft(spectrum, axis=-1):
+    """Complex inverse FFT along axis"""
+    spectrum = np.asarray(spectrum, dtype=_complex_dtype())
+    if _settings['backend'] == 'scipy':
+        return _scipy_fft.ifft(spectrum, axis=axis, workers=_settings['workers'])
+    return np.fft.ifft(spectrum, axis=axis).astype(_complex_dtype(), copy=False)
+
+
+def next_fast_len(n):
+    """Smallest 2-3-5-smooth length >= n"""
+    if _scipy_fft is not None:
+        return _scipy_fft.next_fast_len(n, real=True)
+    if n <= 1:
+        return max(n, 1)
+
+    best = 1 << (n - 1).bit_length()
+    power5 = 1
+    while power5 < best:
+        power35 = power5
+        while power35 < best:
+            # Smallest power of two that lifts power35 to at least n
+            length = power35
+            while length < n:
+                length *= 2
+            best = min(best, length)
+            power35 *= 3
+        power5 *= 5
+    return best
+
+
+def transform_length(n):
+    """Transform size to use for an n-sample clip: next_fast_len(n), or n with padding disabled"""
+    return next_fast_len(n) if _settings['fast_length'] else n
@@ -0,0 +1,33 @@
+"""
+Band-limited resampling of whole clips for ingest.
+
+Tiers are built from the clip's spectrum, so resampling is done in the same domain: the
+clip's real FFT is cut (or zero-extended) at the new Nyquist frequency and inverted at the
+new length. Cutting the spectrum is an ideal anti-alias low-pass, and the clip is already
+in memory whole, so no streaming filter is needed.
+
+Sources decoded by ffmpeg are resampled by ffmpeg on the way in (see decode_audio); this
+covers samples that arrive at another rate, such as WAV files read directly.
+"""
+
+import numpy as np
+
+from audio import fft_backend
+
+
+def resample(data, source_rate, target_rate):
+    """Resample float samples (mono, or (channels, n)) from source_rate to target_rate Hz; unchanged if equal"""
+    if not target_rate or int(target_rate) == int(source_rate):
+        return data
+    n = data.shape[-1]
+    n_out = max(int(round(n * target_rate / source_rate)), 1)
+
+    spectrum = fft_backend.rfft(data)
+    kept = min(spectrum.shape[-1], n_out // 2 + 1)
+    resized = np.zeros(spectrum.shape[:-1] + (n_out // 2 + 1,), dtype=spectrum.dtype)
+    resized[..., :kept] = spectrum[..., :kept]
+    if n_out % 2 == 0 and kept == n_out // 2 + 1 and n_out < n:
+        # The new Nyquist bin stands for both of its mirrored halves in the old spectrum
+        resized[..., -1] = resized[..., -1].real
+    # Keep amplitudes: irfft divides by the new length, rfft did not divide by the old one
+    return (fft_backend.irfft(resized, n=n_out) * (n_out / n)).astype(data.dtype, copy=False)
@@ -0,0 +1,258 @@
+"""
+Spectral layering engine shared by AudioService and layersFFT.
+
+A tier keeps the strongest coefficients of the clip's real FFT and drops the rest.
+Coefficients are picked by scattering their bin indices straight into an empty
+spectrum, so building a tier costs one inverse transform and no per-frequency search.
+
+Transforms go through audio.fft_backend. The transform length n may be larger than the
+clip (zero-padded to a fast FFT size); renderers take the clip length to trim back to.
+
+Clips are mono (n,) or multichannel (channels, n). Multichannel clips share one ranking,
+made from the magnitude summed over channels, so every channel keeps the same bins and
+all channels are transformed and inverted together along the last axis. A stereo pair is
+inverted as one complex FFT (left in the real part, right in the imaginary part), which
+costs about what one channel's real inverse does.
+"""
+
+import numpy as np
+
+from audio import fft_backend
+
+# Coefficients quieter than this fraction of the loudest one are treated as noise
+NOISE_FLOOR_RATIO = 0.01
+
+# How render_tiers builds a ladder of tiers:
+#   independent - rank and invert every tier from scratch
+#   incremental - low-memory mode: rank once, add each tier's new coefficients to the previous
+#                 tier. Still one full-length inverse per tier, so no faster than batched, but
+#                 only one tier's audio is held at a time
+#   batched     - rank once, invert every tier in a single 2-D transform (fastest; holds all tiers)
+TIER_MODES = ('independent', 'incremental', 'batched')
+
+
+def compute_spectrum(data, n=None):
+    """Real FFT of the clip (non-negative frequency bins only), zero-padded to n samples"""
+    return fft_backend.rfft(data, n=n)
+
+
+def ranking_magnitude(spectrum):
+    """Magnitude a ranking is made from: per bin, summed over channels for multichannel spectra"""
+    magnitude = np.abs(spectrum)
+    return magnitude.reshape(-1, magnitude.shape[-1]).sum(axis=0) if magnitude.ndim > 1 else magnitude
+
+
+def bin_frequencies(n, sample_rate):
+    """Frequency in Hz of every bin returned by compute_spectrum"""
+    return np.fft.rfftfreq(n, 1 / sample_rate)
+
+
+def significant_bins(magnitude, threshold_ratio=NOISE_FLOOR_RATIO):
+    """Indices of bins whose magnitude clears the noise floor"""
+    threshold = np.max(magnitude) * threshold_ratio
+    return np.flatnonzero(magnitude > threshold)
+
+
+def _bin_weights(n, num_bins):
+    """Number of two-sided FFT coefficients each real-FFT bin stands for"""
+    weights = np.full(num_bins, 2, dtype=np.int64)
+    weights[0] = 1
+    if n % 2 == 0:
+        weights[-1] = 1  # Nyquist bin has no mirror
+    return weights
+
+
+def select_top_bins(magnitude, n, count, candidates=None):
+    """
+    Strongest real-FFT bins covering `count` coefficients, loudest first.
+
+    Tier sizes were defined on the two-sided FFT, where every positive bin has a
+    conjugate mirror. A bin therefore counts twice (DC and Nyquist once) so tiers
+    keep the same number of frequencies as before.
+    """
+    if candidates is None:
+        candidates = significant_bins(magnitude)
+    order = candidates[np.argsort(magnitude[candidates])[::-1]]
+    covered = np.cumsum(_bin_weights(n, len(magnitude))[order])
+    return order[:np.searchsorted(covered, count) + 1]
+
+
+def reconstruct(spectrum, bins, n):
+    """Inverse real FFT of `spectrum` with everything outside `bins` zeroed"""
+    filtered = np.zeros_like(spectrum)
+    filtered[..., bins] = spectrum[..., bins]
+    return fft_backend.irfft(filtered, n=n)
+
+
+def normalize(audio):
+    """Scale audio so its loudest sample sits at full scale"""
+    peak = np.max(np.abs(audio))
+    if peak == 0:
+        return audio
+    return audio / peak
+
+
+def rank_bins(magnitude, n, max_count, candidates=None):
+    """
+    Bins needed for the largest tier, loudest first, plus coefficients covered so far.
+
+    Only the top `max_count` candidates can matter, so they are split off with a
+    partial sort and just that slice is ordered. Smaller tiers are prefixes of the
+    result because tiers are nested.
+    """
+    if candidates is None:
+        candidates = significant_bins(magnitude)
+    keep = min(max_count, len(candidates))
+    if keep < len(candidates):
+        candidates = candidates[np.argpartition(magnitude[candidates], -keep)[-keep:]]
+    order = candidates[np.argsort(magnitude[candidates])[::-1]]
+    covered = np.cumsum(_bin_weights(n, len(magnitude))[order])
+    return order, covered
+
+
+def tier_sizes(covered, levels):
+    """Number of ranked bins each tier in `levels` takes from rank_bins"""
+    return [int(np.searchsorted(covered, level)) + 1 for level in levels]
+
+
+def coefficients_covered(bins, n):
+    """Running count of two-sided coefficients covered by ranked `bins`"""
+    return np.cumsum(_bin_weights(n, n // 2 + 1)[bins])
+
+
+def rank_spectrum(data, max_count, n=None):
+    """
+    Ranked bins and their complex values for tiers up to `max_count`, loudest first.
+
+    This is everything render_ranked_tiers needs, so it is what gets persisted per song.
+    n is the transform length (the clip is zero-padded to it); default the clip length.
+    """
+    if n is None:
+        n = data.shape[-1]
+    spectrum = compute_spectrum(data, n)
+    bins, _ = rank_bins(ranking_magnitude(spectrum), n, max_count)
+    return bins, spectrum[..., bins]
+
+
+def _invert_rows(bins, values, n, parts, length):
+    """
+    Inverse transforms of sparse spectra, one per row: row r keeps bins[parts[r]] with their
+    values[..., parts[r]]. Returns (rows, length) or (rows, channels, length).
+    """
+    dtype = np.result_type(values, np.complex64)
+    if values.ndim == 2 and values.shape[0] == 2:
+        # Both channels in one two-sided spectrum: left + i*right, mirrored as conj(left) + i*conj(right)
+        mirrored = (bins != 0) & (2 * bins != n)
+        full = np.zeros((len(parts), n), dtype=dtype)
+        for row, part in enumerate(parts):
+            row_bins, row_mirrored = bins[part], mirrored[part]
+            # DC and Nyquist are real in a real signal's spectrum (irfft drops their imaginary parts)
+            left = np.where(row_mirrored, values[0, part], values[0, part].real)
+            right = np.where(row_mirrored, values[1, part], values[1, part].real)
+            full[row, row_bins] = left + 1j * right
+            full[row, n - row_bins[row_mirrored]] = (np.conj(left[row_mirrored])
+                                                     + 1j * np.conj(right[row_mirrored]))
+        packed = fft_backend.ifft(full, axis=-1)[:, :length]
+        return np.stack([packed.real, packed.imag], axis=1)
+
+    stacked = np.zeros((len(parts),) + values.shape[:-1] + (n // 2 + 1,), dtype=dtype)
+    for row, part in enumerate(parts):
+        stacked[row][..., bins[part]] = values[..., part]
+    return fft_backend.irfft(stacked, n=n, axis=-1)[..., :length]
+
+
+def _sparse_irfft(bins, values, n):
+    return _invert_rows(bins, values, n, [slice(None)], n)[0]
+
+
+def _independent_tiers(spectrum, magnitude, n, levels, length):
+    candidates = significant_bins(magnitude)
+    for level in levels:
+        bins = select_top_bins(magnitude, n, level, candidates)
+        yield level, bins, normalize(reconstruct(spectrum, bins, n)[..., :length])
+
+
+def _incremental_tiers(bins, values, n, levels, length):
+    """Low-memory ladder: a running sum plus one tier's inverse in memory, instead of every tier"""
+    levels = sorted(levels)
+    running = np.zeros(values.shape[:-1] + (length,), dtype=np.float32)
+    start = 0
+    for level, size in zip(levels, tier_sizes(coefficients_covered(bins, n), levels)):
+        # irfft is linear, so the new coefficients can be inverted on their own
+        if size > start:
+            running = running + _sparse_irfft(bins[start:size], values[..., start:size], n)[..., :length]
+            start = size
+        yield level, bins[:size], normalize(running.copy())
+
+
+def _batched_tiers(bins, values, n, levels, length):
+    sizes = tier_sizes(coefficients_covered(bins, n), levels)
+    audio = _invert_rows(bins, values, n, [slice(0, size) for size in sizes], length)
+    for row, (level, size) in enumerate(zip(levels, sizes)):
+        yield level, bins[:size], normalize(audio[row])
+
+
+def render_ranked_tiers(bins, values, n, levels, mode='batched', length=None):
+    """
+    Yield (level, bins, normalized audio) from a ranking made by rank_spectrum.
+
+    n is the transform length of the ranking; tiers are trimmed to `length` samples
+    (default n). Levels beyond what the ranking covers are rendered from every ranked bin.
+    Multichannel values (channels, bins) give tiers shaped (channels, length).
+    """
+    if not levels:
+        return
+    if length is None:
+        length = n
+    if mode == 'incremental':
+        yield from _incremental_tiers(bins, values, n, levels, length)
+    elif mode == 'batched':
+        yield from _batched_tiers(bins, values, n, levels, length)
+    else:
+        raise ValueError(f"Tier mode {mode} cannot render from a stored ranking")
+
+
+def render_residual_tiers(bins, values, n, levels, length=None):
+    """
+    Residual signals for progressive delivery from a ranking made by rank_spectrum.
+
+    Returns (levels, residuals, peaks) with levels sorted ascending. residuals[k] holds
+    only the coefficients tier k adds to tier k-1, so the first k+1 residuals sum to
+    tier k before normalization, and peaks[k] is that sum's peak: dividing the sum by
+    peaks[k] gives exactly what render_ranked_tiers yields for levels[k]. Residuals are
+    trimmed to `length` samples (default n) like the tiers.
+    """
+    levels = sorted(levels)
+    sizes = tier_sizes(coefficients_covered(bins, n), levels)
+    parts, start = [], 0
+    for size in sizes:
+        parts.append(slice(start, max(start, size)))
+        start = max(start, size)
+    residuals = _invert_rows(bins, values, n, parts, length)
+    peaks = np.abs(np.cumsum(residuals, axis=0)).reshape(len(levels), -1).max(axis=-1)
+    return levels, residuals, peaks
+
+
+def render_tiers(data, levels, mode='batched', n=None):
+    """
+    Yield (level, bins, normalized audio) for every tier size in `levels`.
+
+    `incremental` yields tiers smallest first and holds one tier in memory at a time;
+    the other modes keep the order of `levels`. `batched` holds every tier in memory
+    at once and is the fastest. n is the transform length
+    (default the clip length); tiers always come out at the clip's length.
+    """
+    if mode not in TIER_MODES:
+        raise ValueError(f"Unknown tier mode: {mode}. Expected one of {', '.join(TIER_MODES)}")
+    if not levels:
+        return
+
+    length = data.shape[-1]
+    if n is None:
+        n = length
+    if mode == 'independent':
+        spectrum = compute_spectrum(data, n)
+        yield from _independent_tiers(spectrum, ranking_magnitude(spectrum), n, levels, length)
+    else:
+        bins, values = rank_spectrum(data, max(levels), n)
+        yield from render_ranked_tiers(bins, values, n, levels, mode, length)
@@ -0,0 +1,90 @@
+"""
+Per-song spectral artifact (spectrum.npz next to the tier WAVs).
+
+Holds the ranked real-FFT bins and their complex values up to the largest tier, so
+tiers can be re-rendered with audio.spectral_layers.render_ranked_tiers without
+downloading or decoding the source again.
+"""
+
+import os
+import struct
+import zipfile
+from collections import namedtuple
+
+import numpy as np
+
+SPECTRUM_FILENAME = 'spectrum.npz'
+
+# bins: ranked rfft bin indices (loudest first); values: their complex coefficients,
+# shaped (bins,) for mono songs and (channels, bins) for stereo ones;
+# n: transform length (irfft length, the clip zero-padded to a fast FFT size);
+# sample_rate: Hz; length: clip length in samples (tiers are trimmed to it)
+StoredSpectrum = namedtuple('StoredSpectrum', ['bins', 'values', 'n', 'sample_rate', 'length'])
+
+
+# Binary coefficient payload for client-side synthesis (all little-endian):
+#   4s magic b'FLCO', uint16 version, uint16 reserved, uint32 n, uint32 sample_rate, uint32 count,
+#   uint32 length (version 2+), then uint32 bins[count], then float32 (real, imag) pairs[count]
+PAYLOAD_MAGIC = b'FLCO'
+PAYLOAD_VERSION = 2
+_PAYLOAD_HEADER = struct.Struct('<4sHHIIII')
+
+
+def spectrum_path(song_folder):
+    return os.path.join(song_folder, SPECTRUM_FILENAME)
+
+
+def save_spectrum(song_folder, bins, values, n, sample_rate, length=None):
+    """Write the artifact atomically so readers never see a half-written file (length defaults to n)"""
+    path = spectrum_path(song_folder)
+    temp_path = path + '.tmp.npz'
+    np.savez_compressed(
+        temp_path,
+        bins=np.asarray(bins, dtype=np.int32),
+        values=np.asarray(values, dtype=np.complex64),
+        n=np.int64(n),
+        sample_rate=np.int64(sample_rate),
+        length=np.int64(n if length is None else length),
+    )
+    os.replace(temp_path, path)
+    return path
+
+
+def load_spectrum(song_folder):
+    """StoredSpectrum for a song folder, or None if it was never saved"""
+    path = spectrum_path(song_folder)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as artifact:
+        n = int(artifact['n'])
+        return StoredSpectrum(
+            bins=artifact['bins'],
+            values=artifact['values'],
+            n=n,
+            sample_rate=int(artifact['sample_rate']),
+            # Artifacts written before fast-length padding were never padded
+            length=int(artifact['length']) if 'length' in artifact.files else n,
+        )
+
+
+def spectrum_channels(song_folder):
+    """Channel count of a song's stored spectrum (1 for mono), read from the array header only"""
+    with zipfile.ZipFile(spectrum_path(song_folder)) as archive:
+        with archive.open('values.npy') as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, _, _ = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, _, _ = np.lib.format.read_array_header_2_0(f)
+    return shape[0] if len(shape) > 1 else 1
+
+
+def encode_coefficient_payload(stored, count=None):
+    """Binary payload of the first `count` ranked bins (all of them by default) of a StoredSpectrum"""
+    if count is None:
+        count = len(stored.bins)
+    bins = np.asarray(stored.bins[:count], dtype='<u4')
+    values = np.asarray(stored.values[:count], dtype='<c8').view('<f4')
+    header = _PAYLOAD_HEADER.pack(PAYLOAD_MAGIC, PAYLOAD_VERSION, 0, stored.n, stored.sample_rate, len(bins),
+                                  stored.length)
+    return header + bins.tobytes() + values.tobytes()
@@ -0,0 +1,159 @@
+"""
+Chunked STFT layering engine for long clips.
+
+The whole-clip engine (spectral_layers) inverts one FFT the length of the clip, so its
+memory grows with the window an admin picks. This engine works on overlapping windowed
+frames instead and streams every tier out through overlap-add, so its working memory
+depends only on the frame size and the largest tier, never on clip length.
+
+Tier semantics match the whole-clip engine: a tier keeps the loudest coefficients of
+the clip until it covers `level` two-sided coefficients, here ranked across every
+frame of the STFT, and is then peak-normalized. That takes three streaming passes:
+  1. rank: keep a bounded pool of the loudest coefficients seen so far and derive the
+     magnitude each tier must reach
+  2. render: mask every frame per tier, invert and overlap-add, writing unnormalized
+     samples to scratch files and tracking each tier's peak
+  3. normalize: copy each scratch file into its output WAV scaled by 1/peak
+
+Multichannel clips (channels, n) share one ranking from the magnitude summed over
+channels, as in the whole-clip engine, and come out as multichannel WAVs.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from audio import fft_backend
+from audio.spectral_layers import NOISE_FLOOR_RATIO, _bin_weights, ranking_magnitude
+
+DEFAULT_FRAME_SIZE = 4096
+_COPY_BLOCK = 1 << 16
+
+
+def _window(frame_size):
+    # sqrt of a periodic Hann: used for analysis and synthesis, their product overlap-adds to 1 at 50% hop
+    return np.sqrt(0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame_size) / frame_size))
+
+
+def _frame_spectra(data, frame_size):
+    """Yield the windowed rfft of each 50%-overlapping frame; frames start one hop before the clip"""
+    n = data.shape[-1]
+    hop = frame_size // 2
+    window = _window(frame_size)
+    frame = np.zeros(data.shape[:-1] + (frame_size,))
+    for start in range(-hop, n, hop):
+        lo, hi = max(start, 0), min(start + frame_size, n)
+        frame[:] = 0
+        frame[..., lo - start:hi - start] = data[..., lo:hi]
+        yield start, fft_backend.rfft(frame * window)
+
+
+def tier_thresholds(data, levels, frame_size=DEFAULT_FRAME_SIZE):
+    """
+    Pass 1: the magnitude a coefficient must reach to be in each tier (same order as levels)
+
+    Each bin stands for two coefficients (DC and Nyquist for one), as in the whole-clip
+    engine, so at most max(levels) bins can matter; only that many are kept between frames.
+    """
+    keep = max(levels)
+    weights = _bin_weights(frame_size, frame_size // 2 + 1)
+    pool_magnitude = np.empty(0)
+    pool_weight = np.empty(0, dtype=np.int64)
+    loudest = 0.0
+
+    for _, spectrum in _frame_spectra(data, frame_size):
+        magnitude = ranking_magnitude(spectrum)
+        loudest = max(loudest, float(magnitude.max()))
+        pool_magnitude = np.concatenate([pool_magnitude, magnitude])
+        pool_weight = np.concatenate([pool_weight, weights])
+        if len(pool_magnitude) > keep:
+            top = np.argpartition(pool_magnitude, -keep)[-keep:]
+            pool_magnitude, pool_weight = pool_magnitude[top], pool_weight[top]
+
+    order = np.argsort(pool_magnitude)[::-1]
+    ranked, covered = pool_magnitude[order], np.cumsum(pool_weight[order])
+    noise_floor = loudest * NOISE_FLOOR_RATIO
+    thresholds = []
+    for level in levels:
+        index = min(int(np.searchsorted(covered, level)), len(ranked) - 1)
+        # Strictly above the noise floor, as significant_bins requires
+        thresholds.append(max(ranked[index], np.nextafter(noise_floor, np.inf)))
+    return np.array(thresholds)
+
+
+def render_stft_tiers(data, levels, write_block, frame_size=DEFAULT_FRAME_SIZE, thresholds=None):
+    """
+    Pass 2: stream every tier through masked inverse frames and overlap-add
+
+    write_block(tier_index, samples) receives each tier's unnormalized audio in order, one
+    hop at a time (shaped (channels, hop) for multichannel clips). Returns each tier's peak,
+    for normalization.
+    """
+    if frame_size % 2:
+        raise ValueError(f"frame_size must be even, got {frame_size}")
+    if thresholds is None:
+        thresholds = tier_thresholds(data, levels, frame_size)
+
+    n = data.shape[-1]
+    hop = frame_size // 2
+    window = _window(frame_size)
+    limits = np.asarray(thresholds)[:, None]
+    pending = np.zeros((len(levels),) + data.shape[:-1] + (frame_size,))
+    peaks = np.zeros(len(levels))
+
+    for start, spectrum in _frame_spectra(data, frame_size):
+        # One masked copy of the frame per tier, inverted together; every channel keeps the same bins
+        keep = ranking_magnitude(spectrum)[None, :] >= limits
+        masked = np.where(keep.reshape(keep.shape[:1] + (1,) * (spectrum.ndim - 1) + keep.shape[1:]),
+                          spectrum[None], 0)
+        pending += fft_backend.irfft(masked, n=frame_size, axis=-1) * window
+
+        # Samples start..start+hop get nothing from later frames, so they are final
+        lo, hi = max(start, 0), min(start + hop, n)
+        if hi > lo:
+            done = pending[..., lo - start:hi - start]
+            peaks = np.maximum(peaks, np.abs(done).reshape(len(levels), -1).max(axis=-1))
+            for tier in range(len(levels)):
+                write_block(tier, done[tier])
+        pending = np.roll(pending, -hop, axis=-1)
+        pending[..., -hop:] = 0
+    return peaks
+
+
+def write_stft_tiers(data, sample_rate, levels, output_files, frame_size=DEFAULT_FRAME_SIZE,
+                     progress_callback=None):
+    """
+    Render every tier with the STFT engine into 16-bit WAV files (output_files[i] for levels[i])
+
+    Unnormalized tiers are spooled to float32 scratch files next to the outputs, then copied
+    into place scaled by their peak, a block at a time.
+    progress_callback, if given, is called as (tiers_done, tiers_total) after each tier is saved.
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_files[0]))
+    channels = 1 if data.ndim == 1 else data.shape[0]
+    scratch = [tempfile.TemporaryFile(dir=output_dir) for _ in levels]
+    try:
+        def write_block(tier, samples):
+            # Interleaved frames, as the WAV stores them
+            scratch[tier].write(samples.T.astype('<f4').tobytes())
+
+        peaks = render_stft_tiers(data, levels, write_block, frame_size)
+
+        for tier, (peak, output_file) in enumerate(zip(peaks, output_files)):
+            gain = 1 / peak if peak > 0 else 1.0
+            scratch[tier].seek(0)
+            with sf.SoundFile(output_file, 'w', samplerate=sample_rate, channels=channels,
+                              subtype='PCM_16') as out:
+                while True:
+                    block = scratch[tier].read(_COPY_BLOCK * 4 * channels)
+                    if not block:
+                        break
+                    samples = np.frombuffer(block, dtype='<f4') * gain
+                    out.write(samples if channels == 1 else samples.reshape(-1, channels))
+            if progress_callback:
+                progress_callback(tier + 1, len(levels))
+    finally:
+        for f in scratch:
+            f.close()
@@ -0,0 +1,153 @@
+"""
+Per-song tier manifest (tiers.json next to the tier files).
+
+Written at ingest/re-tier time so the web app can list a song's tiers, build
+content-addressed tier URLs and strong ETags without listing the folder or hashing
+audio per request.
+
+    {
+      "version": 1,
+      "spectrum": "<digest of spectrum.npz>", "channels": 1,   (while spectrum.npz exists)
+      "sample_rate": 44100, "duration": 10.0,
+      "tiers": {"<level>.<ext>": {"digest": "<digest>", "bytes": 123456, "duration": 10.0}, ...}
+    }
+
+Songs ingested before manifests have a tier_hashes.json holding only digests
+({"spectrum": ..., "tiers": {"<level>.<ext>": "<digest>"}}); it is read as a legacy
+manifest, and merged into tiers.json (then removed) the next time the song is written.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+MANIFEST_FILENAME = 'tiers.json'
+LEGACY_HASHES_FILENAME = 'tier_hashes.json'
+MANIFEST_VERSION = 1
+DIGEST_LENGTH = 16  # hex characters of SHA-256 kept in URLs and ETags
+# Part of every derived digest: bump when rendering or encoding changes the bytes of on-demand tiers
+RENDER_VERSION = 1
+
+# In-process cache: song folder -> (path, mtime_ns, manifest)
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def manifest_path(song_folder):
+    return os.path.join(song_folder, MANIFEST_FILENAME)
+
+
+def bytes_digest(data):
+    return hashlib.sha256(data).hexdigest()[:DIGEST_LENGTH]
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:DIGEST_LENGTH]
+
+
+def derived_digest(spectrum_digest, level, fmt, settings=()):
+    """
+    Digest for a tier rendered on demand: fixed by the spectrum it is rendered from,
+    RENDER_VERSION and the render settings (encoder bitrate, FFT precision, ...) that shape its bytes
+    """
+    parts = [spectrum_digest, level, fmt, f'r{RENDER_VERSION}', *settings]
+    return bytes_digest(':'.join(str(part) for part in parts).encode())
+
+
+def tier_key(level, fmt):
+    return f'{level}.{fmt}'
+
+
+def tier_entry(path, duration):
+    """Manifest entry for a tier file written with duration seconds of audio"""
+    return {'digest': file_digest(path), 'bytes': os.path.getsize(path), 'duration': round(float(duration), 6)}
+
+
+def manifest_levels(manifest):
+    """Sorted tier levels that have at least one file in the manifest"""
+    return sorted({int(key.split('.', 1)[0]) for key in manifest.get('tiers', {})})
+
+
+def _read_legacy(path):
+    with open(path) as f:
+        hashes = json.load(f)
+    tiers = {key: {'digest': digest} for key, digest in hashes.get('tiers', {}).items()}
+    manifest = {'tiers': tiers, 'legacy': True}
+    if hashes.get('spectrum'):
+        manifest['spectrum'] = hashes['spectrum']
+    return manifest
+
+
+def load_manifest(song_folder):
+    """
+    Manifest for a song folder ({} if none was written); re-read only when the file changes
+    A legacy tier_hashes.json is returned with "legacy": True: its tier list may be incomplete
+    """
+    for path in (manifest_path(song_folder), os.path.join(song_folder, LEGACY_HASHES_FILENAME)):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            break
+        except FileNotFoundError:
+            continue
+    else:
+        return {}
+
+    with _cache_lock:
+        cached = _cache.get(song_folder)
+        if cached and cached[:2] == (path, mtime):
+            return cached[2]
+
+    if path == manifest_path(song_folder):
+        with open(path) as f:
+            manifest = json.load(f)
+        manifest.setdefault('tiers', {})
+    else:
+        manifest = _read_legacy(path)
+    with _cache_lock:
+        _cache[song_folder] = (path, mtime, manifest)
+    return manifest
+
+
+def update_manifest(song_folder, tiers=None, spectrum=None, remove_tiers=(), remove_spectrum=False, **fields):
+    """
+    Merge tier entries ({key: tier_entry(...)}), the spectrum digest and top-level fields
+    (sample_rate, duration, channels) into the manifest, written atomically
+    remove_tiers drops the given tier keys (their files were deleted); remove_spectrum drops the
+    spectrum digest and channels (the song's spectrum.npz was deleted)
+    """
+    path = manifest_path(song_folder)
+    legacy_path = os.path.join(song_folder, LEGACY_HASHES_FILENAME)
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+    elif os.path.exists(legacy_path):
+        manifest = _read_legacy(legacy_path)
+        del manifest['legacy']
+    else:
+        manifest = {}
+    manifest.setdefault('tiers', {})
+    manifest['version'] = MANIFEST_VERSION
+
+    for key in remove_tiers:
+        manifest['tiers'].pop(key, None)
+    if tiers:
+        manifest['tiers'].update(tiers)
+    if remove_spectrum:
+        manifest.pop('spectrum', None)
+        manifest.pop('channels', None)
+    if spectrum is not None:
+        manifest['spectrum'] = spectrum
+    manifest.update(fields)
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
+    return manifest
@@ -0,0 +1,131 @@
+"""
+Packed tier container (tiers.pack): every tier file of a song back to back in one file.
+
+Layout:
+    8 bytes   magic b'FLTPACK1'
+    4 bytes   index length (little-endian uint32)
+    index     UTF-8 JSON {"tiers": {"<level>.<ext>": [offset, length, digest], ...}}
+    data      tier files, offsets relative to the start of the pack
+
+Readers memory-map the pack once per process and hand out memoryview slices, so
+serving a tier needs no directory walk, per-tier stat or file open.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+
+from audio.tier_manifest import bytes_digest, tier_key
+
+PACK_FILENAME = 'tiers.pack'
+PACK_MAGIC = b'FLTPACK1'
+_HEADER = struct.Struct('<8sI')
+_TIER_FILE = re.compile(r'^reconstructed_audio_(\d+)\.(\w+)$')
+
+# Per-process cache: song folder -> (mtime_ns, TierPack)
+_open_packs = {}
+_open_packs_lock = threading.Lock()
+
+
+def pack_path(song_folder):
+    return os.path.join(song_folder, PACK_FILENAME)
+
+
+def write_pack(song_folder, formats=None):
+    """
+    Pack every reconstructed_audio_<N>.<ext> file in song_folder (optionally only the given formats)
+    Written atomically; returns the packed keys, or [] if there was nothing to pack
+    """
+    blobs = {}
+    for name in sorted(os.listdir(song_folder)):
+        match = _TIER_FILE.match(name)
+        if not match or (formats is not None and match.group(2) not in formats):
+            continue
+        with open(os.path.join(song_folder, name), 'rb') as f:
+            blobs[tier_key(match.group(1), match.group(2))] = f.read()
+    if not blobs:
+        return []
+
+    # Offsets depend on the index size, which depends on the offsets; lay out until stable
+    index_length = 0
+    while True:
+        offset = _HEADER.size + index_length
+        tiers = {}
+        for key, data in blobs.items():
+            tiers[key] = [offset, len(data), bytes_digest(data)]
+            offset += len(data)
+        index = json.dumps({'tiers': tiers}, sort_keys=True).encode()
+        if len(index) == index_length:
+            break
+        index_length = len(index)
+
+    path = pack_path(song_folder)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(PACK_MAGIC, len(index)))
+        f.write(index)
+        for data in blobs.values():
+            f.write(data)
+    os.replace(temp_path, path)
+    return list(blobs)
+
+
+def remove_pack(song_folder):
+    """Delete a song's tiers.pack, if any, and forget this process's map of it"""
+    try:
+        os.remove(pack_path(song_folder))
+    except FileNotFoundError:
+        pass
+    with _open_packs_lock:
+        _open_packs.pop(song_folder, None)
+
+
+class TierPack:
+    """A memory-mapped tiers.pack"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, index_length = _HEADER.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC:
+            raise ValueError(f"{path} is not a tier pack")
+        index = json.loads(self._map[_HEADER.size:_HEADER.size + index_length])
+        self.tiers = index['tiers']
+        self._view = memoryview(self._map)
+
+    def levels(self):
+        return sorted({int(key.split('.', 1)[0]) for key in self.tiers})
+
+    def entry(self, level, fmt):
+        """(offset, length, digest) for a tier, or None if it is not packed"""
+        return self.tiers.get(tier_key(level, fmt))
+
+    def get(self, level, fmt):
+        """Zero-copy memoryview of one tier file, or None if it is not packed"""
+        entry = self.entry(level, fmt)
+        if entry is None:
+            return None
+        offset, length, _ = entry
+        return self._view[offset:offset + length]
+
+
+def open_pack(song_folder):
+    """This process's TierPack for a song folder (None if it has no pack); remapped when the file changes"""
+    path = pack_path(song_folder)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    with _open_packs_lock:
+        cached = _open_packs.get(song_folder)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        # The old map is left to the garbage collector: responses may still be reading slices of it
+        pack = TierPack(path)
+        _open_packs[song_folder] = (mtime, pack)
+        return pack
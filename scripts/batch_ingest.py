@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Batch ingest songs from a manifest file
+Download/decode and tier generation run across a process pool (one worker per core by
+default); the Song rows are created together in one transaction once every song is done.
+
+Manifest: CSV, one song per line (blank lines and lines starting with # are ignored,
+an optional header row starting with "title" is skipped):
+    title,artist,start,end[,source]
+start/end are seconds. source is optional: a local audio file (relative to the manifest)
+or media URL to use instead of searching YouTube, which lets this run fully offline.
+
+Usage:
+    python scripts/batch_ingest.py week12.csv
+    python scripts/batch_ingest.py week12.csv --workers 4 --week 12 --album "Unknown Album"
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models import Song
+from app.services.audio_service import AudioService
+from app.services.ingest_service import IngestService
+
+ManifestEntry = namedtuple('ManifestEntry', ['line', 'title', 'artist', 'start', 'end', 'source', 'folder'])
+
+# Flask app of a pool worker process, created once by _init_worker
+_worker_app = None
+
+def _init_worker(config_name):
+    global _worker_app
+    # The parent app already ran the startup seeding; workers only fetch and write tiers
+    _worker_app = create_app(config_name, seed_defaults=False)
+
+def _ingest_one(entry):
+    """Fetch and tier one song inside a worker process; returns a result dict (never raises)"""
+    result = {'entry': entry, 'success': False, 'fetch_seconds': 0.0, 'process_seconds': 0.0, 'error': None}
+    with _worker_app.app_context():
+        try:
+            start = time.perf_counter()
+            data, sample_rate, _ = AudioService.fetch_audio(
+                entry.title, entry.artist, entry.start, entry.end, source=entry.source
+            )
+            result['fetch_seconds'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result['sample_rate'] = AudioService.process_samples(data, sample_rate, entry.folder)
+            result['downmix'] = AudioService.ingest_format()[1]
+            result['process_seconds'] = time.perf_counter() - start
+            result['success'] = True
+        except Exception as e:
+            result['error'] = str(e)
+    return result
+
+def read_manifest(path):
+    """Returns (entries, errors) where errors are (line number, message) for rows that were skipped"""
+    manifest_dir = os.path.dirname(os.path.abspath(path))
+    entries, errors = [], []
+    with open(path, newline='', encoding='utf-8') as f:
+        for line, row in enumerate(csv.reader(f), start=1):
+            row = [cell.strip() for cell in row]
+            if not row or not any(row) or row[0].startswith('#'):
+                continue
+            if line == 1 and row[0].lower() == 'title':
+                continue
+            if len(row) < 4:
+                errors.append((line, 'expected title,artist,start,end[,source]'))
+                continue
+
+            title, artist = row[0], row[1]
+            try:
+                start, end = float(row[2]), float(row[3])
+            except ValueError:
+                errors.append((line, f'start/end must be seconds, got {row[2]!r}, {row[3]!r}'))
+                continue
+            if not title or not artist or start < 0 or end <= start:
+                errors.append((line, 'title and artist are required and 0 <= start < end'))
+                continue
+
+            source = row[4] if len(row) > 4 and row[4] else None
+            if source and '://' not in source and not os.path.isabs(source):
+                source = os.path.join(manifest_dir, source)
+            entries.append(ManifestEntry(line, title, artist, start, end, source,
+                                         IngestService.song_folder_name(title, artist)))
+    return entries, errors
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch ingest songs from a manifest file')
+    parser.add_argument('manifest', help='CSV file: title,artist,start,end[,source]')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: cores)')
+    parser.add_argument('--week', type=int, default=1, help='Week number for the new songs')
+    parser.add_argument('--album', default='Unknown Album', help='Album for the new songs')
+    parser.add_argument('--config', default=None, help='Config name (default: FLASK_ENV)')
+    args = parser.parse_args()
+
+    entries, errors = read_manifest(args.manifest)
+    for line, message in errors:
+        print(f"❌ Line {line}: {message}")
+
+    app = create_app(args.config)
+    with app.app_context():
+        db.create_all()
+
+        # Skip songs that already exist or appear twice in the manifest
+        pending, seen = [], set()
+        for entry in entries:
+            if entry.folder in seen:
+                print(f"⚠️  Line {entry.line}: '{entry.title}' by {entry.artist} is listed twice; skipping")
+                continue
+            seen.add(entry.folder)
+            if Song.query.filter_by(title=entry.title, artist=entry.artist).first():
+                print(f"⚠️  Line {entry.line}: '{entry.title}' by {entry.artist} already exists; skipping")
+                continue
+            pending.append(entry)
+
+    if not pending:
+        print("Nothing to ingest")
+        sys.exit(1 if errors else 0)
+
+    workers = max(1, min(args.workers, len(pending)))
+    print(f"Ingesting {len(pending)} song(s) with {workers} worker process(es)...")
+    wall_start = time.perf_counter()
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(args.config,)) as pool:
+        futures = [pool.submit(_ingest_one, entry) for entry in pending]
+        for future in as_completed(futures):
+            result = future.result()
+            entry = result['entry']
+            results.append(result)
+            if result['success']:
+                print(f"✅ {entry.title} by {entry.artist}: fetch {result['fetch_seconds']:.1f}s, "
+                      f"tiers {result['process_seconds']:.1f}s")
+            else:
+                print(f"❌ {entry.title} by {entry.artist}: {result['error']}")
+
+    succeeded = [r for r in results if r['success']]
+    failed = [r for r in results if not r['success']]
+
+    # All new songs are added in one transaction
+    with app.app_context():
+        try:
+            for result in succeeded:
+                entry = result['entry']
+                db.session.add(Song(
+                    title=entry.title,
+                    artist=entry.artist,
+                    album=args.album,
+                    week=args.week,
+                    base_filename=entry.folder,
+                    has_frequency_versions=True,
+                    sample_rate=result['sample_rate'],
+                    downmix=result['downmix']
+                ))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Could not add songs to the database: {e}")
+            failed += [{'entry': r['entry'], 'error': 'database commit failed'} for r in succeeded]
+            succeeded = []
+
+    wall = time.perf_counter() - wall_start
+    cpu = sum(r['fetch_seconds'] + r['process_seconds'] for r in results)
+    print()
+    print("=" * 60)
+    print(f"Added {len(succeeded)} song(s), {len(failed)} failed, {len(errors)} manifest error(s)")
+    print(f"Wall time {wall:.1f}s for {cpu:.1f}s of per-song work")
+    for r in failed:
+        print(f"  ❌ line {r['entry'].line}: {r['entry'].title} by {r['entry'].artist} - {r['error']}")
+
+    sys.exit(1 if failed or errors else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the FFT backend (audio/fft_backend.py).
+
+Renders the FREQUENCY_LEVELS ladder (rank_spectrum + batched tiers) for clips whose
+lengths come from odd start/end times, first with the old numpy path (double precision,
+transform at the clip length) and then with each available backend configuration
+(single precision, fast-length padding, worker threads where scipy is installed).
+Reports the median time, the speedup, and each configuration's mean tier SNR against the
+source clip: padding moves the bin grid, so samples differ from the old path, but tiers
+should stay as close to the source.
+
+Usage: python scripts/benchmark_fft.py [seconds] [sample_rate] [repeat]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+from audio import fft_backend
+from audio.spectral_layers import rank_spectrum, render_ranked_tiers
+from benchmark_layers import synthetic_clip
+
+
+def render_ladder(data, levels):
+    n = fft_backend.transform_length(len(data))
+    bins, values = rank_spectrum(data, max(levels), n)
+    return {level: audio for level, _, audio in render_ranked_tiers(bins, values, n, levels, length=len(data))}
+
+
+def snr_db(tier, data):
+    """SNR of a normalized tier against the source, after the best-fitting gain"""
+    gain = np.dot(tier, data) / np.dot(tier, tier)
+    error = data - gain * tier
+    return 10 * np.log10(np.dot(data, data) / np.dot(error, error))
+
+
+def timed_ladder(data, levels, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tiers = render_ladder(data, levels)
+        times.append(time.perf_counter() - start)
+    return tiers, statistics.median(times)
+
+
+def configurations():
+    yield 'numpy double, exact length', dict(backend='numpy', precision='double', fast_length=False)
+    yield 'numpy single, exact length', dict(backend='numpy', precision='single', fast_length=False)
+    yield 'numpy single, fast length', dict(backend='numpy', precision='single', fast_length=True)
+    try:
+        import scipy.fft  # noqa: F401
+    except ImportError:
+        print("(scipy not installed: skipping the scipy backend)\n")
+        return
+    workers = os.cpu_count() or 1
+    yield 'scipy single, fast length', dict(backend='scipy', precision='single', fast_length=True)
+    yield f'scipy single, fast, {workers} workers', dict(backend='scipy', precision='single', fast_length=True,
+                                                         workers=workers)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else Config.AUDIO_DURATION
+    sample_rate = int(sys.argv[2]) if len(sys.argv) > 2 else Config.AUDIO_SAMPLE_RATE
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    levels = list(Config.FREQUENCY_LEVELS)
+
+    # Segment lengths an admin's start/end times can produce: round, smooth-ish and prime-heavy
+    base = int(seconds * sample_rate)
+    lengths = [base, base + 1, base + 37, base - 11]
+
+    for n in lengths:
+        data = synthetic_clip((n + 1) / sample_rate, sample_rate)[:n].astype(np.float64)
+        print(f"Clip: {n} samples ({n / sample_rate:.3f}s), fast length {fft_backend.next_fast_len(n)}")
+        print(f"{'configuration':<34} | {'time (ms)':>10} | {'speedup':>8} | {'SNR (dB)':>9}")
+        print("-" * 70)
+
+        reference_time = None
+        for name, options in configurations():
+            fft_backend.configure(**options)
+            tiers, elapsed = timed_ladder(data, levels, repeat)
+            if reference_time is None:
+                reference_time = elapsed
+            snr = statistics.mean(snr_db(tiers[level].astype(np.float64), data) for level in levels)
+            print(f"{name:<34} | {elapsed * 1000:>10.1f} | {reference_time / elapsed:>7.1f}x | {snr:>9.2f}")
+        print()
+
+    fft_backend.configure()
+
+
+if __name__ == '__main__':
+    main()
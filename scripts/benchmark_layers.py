@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the spectral layering engine.
+
+Times every FREQUENCY_LEVELS tier with the old per-frequency search
+(np.fft.fft + np.argmin per coefficient) and with audio.spectral_layers,
+then reports the speedup and the largest sample difference between the two.
+Finally times the whole ladder in each render_tiers mode.
+
+Usage: python scripts/benchmark_layers.py [seconds] [sample_rate]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+from audio.spectral_layers import (
+    TIER_MODES,
+    compute_spectrum,
+    normalize,
+    reconstruct,
+    render_tiers,
+    select_top_bins,
+    significant_bins,
+)
+
+
+def synthetic_clip(seconds, sample_rate, seed=0):
+    """Pink-ish noise bed plus tonal partials, dense enough to fill every tier"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+
+    bed = np.fft.rfft(rng.standard_normal(n))
+    bed /= np.sqrt(np.maximum(np.fft.rfftfreq(n, 1 / sample_rate), 20.0))
+    clip = np.fft.irfft(bed, n=n)
+    clip /= np.max(np.abs(clip))
+
+    for f0 in rng.uniform(80.0, 4000.0, 60):
+        clip += rng.uniform(0.02, 0.1) * np.sin(2 * np.pi * f0 * t)
+    return (clip / np.max(np.abs(clip))).astype(np.float32)
+
+
+def legacy_tier(data, sample_rate, freq_count):
+    """Tier reconstruction as AudioService.process_through_dft used to do it"""
+    fft_result = np.fft.fft(data)
+    freq = np.fft.fftfreq(len(data), 1 / sample_rate)
+    magnitude = np.abs(fft_result)
+    available_indices = np.where(magnitude > np.max(magnitude) * 0.01)[0]
+
+    top_indices = available_indices[np.argsort(magnitude[available_indices])[-freq_count:][::-1]]
+    filtered_fft = np.zeros_like(fft_result)
+    for freq_val in freq[top_indices]:
+        freq_index = np.argmin(np.abs(freq - freq_val))
+        filtered_fft[freq_index] = fft_result[freq_index]
+        if freq_index > 0:
+            filtered_fft[len(fft_result) - freq_index] = np.conj(fft_result[freq_index])
+
+    reconstructed = np.real(np.fft.ifft(filtered_fft))
+    return reconstructed / np.max(np.abs(reconstructed))
+
+
+def engine_tier(data, freq_count):
+    """Tier reconstruction through audio.spectral_layers"""
+    spectrum = compute_spectrum(data)
+    magnitude = np.abs(spectrum)
+    bins = select_top_bins(magnitude, len(data), freq_count, significant_bins(magnitude))
+    return normalize(reconstruct(spectrum, bins, len(data)))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else Config.AUDIO_DURATION
+    sample_rate = int(sys.argv[2]) if len(sys.argv) > 2 else Config.AUDIO_SAMPLE_RATE
+    data = synthetic_clip(seconds, sample_rate)
+
+    print(f"Clip: {seconds:g}s at {sample_rate} Hz ({len(data)} samples)")
+    print(f"{'Tier':>6} | {'before (ms)':>12} | {'after (ms)':>11} | {'speedup':>8} | {'max diff':>9}")
+    print("-" * 60)
+
+    total_before = total_after = 0.0
+    for freq_count in Config.FREQUENCY_LEVELS:
+        before, t_before = timed(legacy_tier, data, sample_rate, freq_count)
+        after, t_after = timed(engine_tier, data, freq_count)
+        total_before += t_before
+        total_after += t_after
+        diff = np.max(np.abs(before - after))
+        print(f"{freq_count:>6} | {t_before * 1000:>12.1f} | {t_after * 1000:>11.1f} | "
+              f"{t_before / t_after:>7.1f}x | {diff:>9.2e}")
+
+    print("-" * 60)
+    print(f"{'total':>6} | {total_before * 1000:>12.1f} | {total_after * 1000:>11.1f} | "
+          f"{total_before / total_after:>7.1f}x |")
+
+    print(f"\nWhole ladder ({len(Config.FREQUENCY_LEVELS)} tiers) by render_tiers mode:")
+    reference = None
+    for mode in TIER_MODES:
+        tiers, elapsed = timed(lambda: {level: audio for level, _, audio in
+                                        render_tiers(data, Config.FREQUENCY_LEVELS, mode)})
+        if reference is None:
+            reference = tiers
+        diff = max(np.max(np.abs(tiers[level] - reference[level])) for level in tiers)
+        print(f"{mode:>12} | {elapsed * 1000:>9.1f} ms | max diff vs independent {diff:.2e}")
+
+
+if __name__ == '__main__':
+    main()
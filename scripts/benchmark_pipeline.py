@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the audio pipeline.
+
+Times read_wav_file, decode_audio (the ffmpeg pipe for non-WAV input),
+AudioService.process_through_dft and save_audio on synthetic clips, across clip lengths,
+sample rates and tier sets. Every stage runs in its own subprocess so its peak RSS is not
+inflated by earlier stages; each result records wall time, peak RSS (and the increase over
+the process baseline) and bytes written.
+
+Results are written as JSON; `compare` diffs two result files and exits 1 on regressions.
+
+Usage:
+    python scripts/benchmark_pipeline.py run -o baseline.json
+    python scripts/benchmark_pipeline.py run --lengths 10,60 --rates 22050,44100 \\
+        --tiers 100,1000,10000 --tiers default -o current.json
+    python scripts/benchmark_pipeline.py compare baseline.json current.json --threshold 10
+"""
+
+import argparse
+import json
+import logging.handlers
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+
+STAGES = ['read_wav_file', 'decode_audio', 'process_through_dft', 'save_audio']
+RESULTS_VERSION = 1
+
+
+def synthetic_signal(kind, seconds, sample_rate):
+    """'tone' is the dev_seed demo tone; 'dense' adds a noise bed and partials so every tier fills"""
+    n = int(seconds * sample_rate)
+    t = np.linspace(0, seconds, n, endpoint=False)
+    if kind == 'tone':
+        return (0.2 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+    rng = np.random.default_rng(0)
+    clip = 0.05 * rng.standard_normal(n)
+    for f0 in rng.uniform(80.0, 4000.0, 40):
+        clip += rng.uniform(0.02, 0.1) * np.sin(2 * np.pi * f0 * t)
+    return (0.8 * clip / np.max(np.abs(clip))).astype(np.float32)
+
+
+def _peak_rss_bytes():
+    # On Linux ru_maxrss survives fork+exec, so a child would report the parent's peak;
+    # VmHWM belongs to the address space exec created
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _folder_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def run_stage(stage, case):
+    """Run one stage in this process; returns its measurements (called in the child)"""
+    workdir = case['workdir']
+    levels = case['levels']
+    baseline_rss = _peak_rss_bytes()
+    bytes_written = 0
+
+    if stage == 'read_wav_file':
+        from app.utils.helpers.read_wav_file import read_wav_file
+        start = time.perf_counter()
+        read_wav_file(case['wav'])
+        elapsed = time.perf_counter() - start
+
+    elif stage == 'decode_audio':
+        from audio.decode import decode_audio
+        start = time.perf_counter()
+        decode_audio(case['flac'], ffmpeg=Config.FFMPEG_BINARY)
+        elapsed = time.perf_counter() - start
+
+    elif stage == 'process_through_dft':
+        from app import create_app
+        from app.services.audio_service import AudioService
+        app = create_app('testing')
+        output_root = os.path.join(workdir, 'tiers')
+        app.config['AUDIO_OUTPUT_FOLDER'] = output_root
+        app.config['FREQUENCY_LEVELS'] = levels
+        # process_through_dft logs its errors and returns False; keep them for the report
+        logged = logging.handlers.BufferingHandler(capacity=100)
+        logged.setLevel(logging.ERROR)
+        app.logger.addHandler(logged)
+        with app.app_context():
+            start = time.perf_counter()
+            ok = AudioService.process_through_dft(case['wav'], 'bench', 'bench')
+            elapsed = time.perf_counter() - start
+        if not ok:
+            reason = logged.buffer[-1].getMessage() if logged.buffer else 'no error logged'
+            raise RuntimeError(f'process_through_dft failed: {reason}')
+        bytes_written = _folder_bytes(output_root)
+        shutil.rmtree(output_root)
+
+    elif stage == 'save_audio':
+        from app.utils.helpers.read_wav_file import save_audio
+        data, sample_rate = sf.read(case['wav'], dtype='float32')
+        baseline_rss = _peak_rss_bytes()
+        output_file = os.path.join(workdir, 'saved.wav')
+        start = time.perf_counter()
+        save_audio(data, sample_rate, output_file)
+        elapsed = time.perf_counter() - start
+        bytes_written = os.path.getsize(output_file)
+        os.remove(output_file)
+
+    else:
+        raise ValueError(f"Unknown stage: {stage}")
+
+    peak = _peak_rss_bytes()
+    return {
+        'wall_seconds': elapsed,
+        'peak_rss_bytes': peak,
+        'rss_increase_bytes': max(peak - baseline_rss, 0),
+        'bytes_written': bytes_written,
+    }
+
+
+def _run_in_subprocess(stage, case):
+    cmd = [sys.executable, os.path.abspath(__file__), '_stage', stage, json.dumps(case)]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'stage failed')
+    # The measurements are the last line; stages may print progress before it
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _parse_tier_set(text):
+    if text == 'default':
+        return list(Config.FREQUENCY_LEVELS)
+    return sorted(int(level) for level in text.split(','))
+
+
+def cmd_run(args):
+    lengths = [float(value) for value in args.lengths.split(',')]
+    rates = [int(value) for value in args.rates.split(',')]
+    tier_sets = [_parse_tier_set(text) for text in (args.tiers or ['default'])]
+    stages = args.stages.split(',') if args.stages else STAGES
+    for stage in stages:
+        if stage not in STAGES:
+            sys.exit(f"❌ Unknown stage {stage!r}; expected one of {', '.join(STAGES)}")
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix='fl_bench_')
+    try:
+        for seconds in lengths:
+            for sample_rate in rates:
+                data = synthetic_signal(args.signal, seconds, sample_rate)
+                wav = os.path.join(workdir, 'source.wav')
+                flac = os.path.join(workdir, 'source.flac')
+                sf.write(wav, data, sample_rate, subtype='PCM_16', format='WAV')
+                sf.write(flac, data, sample_rate, subtype='PCM_16', format='FLAC')
+
+                for levels in tier_sets:
+                    for stage in stages:
+                        # Tier sets only change process_through_dft; run the other stages once
+                        if stage != 'process_through_dft' and levels is not tier_sets[0]:
+                            continue
+                        case = {'workdir': workdir, 'wav': wav, 'flac': flac, 'levels': levels}
+                        label = f"{stage:<21} {seconds:>6g}s {sample_rate:>6} Hz"
+                        if stage == 'process_through_dft':
+                            label += f" {len(levels)} tiers (max {max(levels)})"
+
+                        runs, error = [], None
+                        for _ in range(args.repeat):
+                            try:
+                                runs.append(_run_in_subprocess(stage, case))
+                            except Exception as e:
+                                error = str(e)
+                                break
+
+                        entry = {
+                            'stage': stage,
+                            'seconds': seconds,
+                            'sample_rate': sample_rate,
+                            'tiers': levels if stage == 'process_through_dft' else None,
+                        }
+                        if error:
+                            entry['error'] = error
+                            print(f"❌ {label}: {error}")
+                        else:
+                            entry.update({
+                                'wall_seconds': statistics.median(r['wall_seconds'] for r in runs),
+                                'peak_rss_bytes': max(r['peak_rss_bytes'] for r in runs),
+                                'rss_increase_bytes': max(r['rss_increase_bytes'] for r in runs),
+                                'bytes_written': runs[-1]['bytes_written'],
+                                'repeat': len(runs),
+                            })
+                            print(f"✅ {label}: {entry['wall_seconds'] * 1000:9.1f} ms, "
+                                  f"peak RSS {entry['peak_rss_bytes'] / 1e6:7.1f} MB "
+                                  f"(+{entry['rss_increase_bytes'] / 1e6:.1f}), "
+                                  f"wrote {entry['bytes_written'] / 1e6:.2f} MB")
+                        results.append(entry)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'version': RESULTS_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'signal': args.signal,
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} result(s) to {args.output}")
+    sys.exit(1 if any('error' in r for r in results) else 0)
+
+
+def _result_key(result):
+    return (result['stage'], result['seconds'], result['sample_rate'], tuple(result['tiers'] or ()))
+
+
+def _change(before, after):
+    return (after - before) / before * 100 if before else 0.0
+
+
+def cmd_compare(args):
+    with open(args.baseline) as f:
+        baseline = {_result_key(r): r for r in json.load(f)['results'] if 'error' not in r}
+    with open(args.current) as f:
+        current = [r for r in json.load(f)['results'] if 'error' not in r]
+
+    print(f"{'stage':<21} {'clip':>8} {'rate':>6} {'tiers':>6} | {'time':>8} | {'peak RSS':>9} | {'written':>8}")
+    print("-" * 78)
+    regressions = matched = 0
+    for result in current:
+        before = baseline.get(_result_key(result))
+        if before is None:
+            continue
+        matched += 1
+        changes = [
+            _change(before['wall_seconds'], result['wall_seconds']),
+            _change(before['peak_rss_bytes'], result['peak_rss_bytes']),
+            _change(before['bytes_written'], result['bytes_written']),
+        ]
+        regressed = changes[0] > args.threshold or changes[1] > args.threshold
+        regressions += regressed
+        tiers = len(result['tiers']) if result['tiers'] else '-'
+        print(f"{result['stage']:<21} {result['seconds']:>7g}s {result['sample_rate']:>6} {tiers:>6} | "
+              f"{changes[0]:>+7.1f}% | {changes[1]:>+8.1f}% | {changes[2]:>+7.1f}%"
+              f"{'  ⚠️ regression' if regressed else ''}")
+
+    print("-" * 78)
+    if not matched:
+        sys.exit("❌ No results in common; run both with the same lengths, rates and tier sets")
+    print(f"{matched} result(s) compared, {regressions} regression(s) over {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '_stage':
+        # Child process: run one stage and print its measurements as the last line
+        print(json.dumps(run_stage(sys.argv[2], json.loads(sys.argv[3]))))
+        return
+
+    parser = argparse.ArgumentParser(description='Benchmark the audio pipeline stages')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Run the benchmark and write results as JSON')
+    run.add_argument('-o', '--output', default='benchmark_results.json', help='Results file')
+    run.add_argument('--lengths', default='10,30', help='Clip lengths in seconds (comma-separated)')
+    run.add_argument('--rates', default=str(Config.AUDIO_SAMPLE_RATE), help='Sample rates (comma-separated)')
+    run.add_argument('--tiers', action='append',
+                     help="Tier set as comma-separated levels, or 'default' for FREQUENCY_LEVELS (repeatable)")
+    run.add_argument('--stages', help=f"Stages to run (default: {','.join(STAGES)})")
+    run.add_argument('--signal', choices=['tone', 'dense'], default='dense', help='Synthetic signal')
+    run.add_argument('--repeat', type=int, default=3, help='Runs per stage; the median time is kept')
+    run.set_defaults(func=cmd_run)
+
+    compare = commands.add_parser('compare', help='Compare results against a saved baseline')
+    compare.add_argument('baseline', help='Baseline results file')
+    compare.add_argument('current', help='Results file to check')
+    compare.add_argument('--threshold', type=float, default=10.0,
+                         help='Percent increase in time or peak RSS that counts as a regression')
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
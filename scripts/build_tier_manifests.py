@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Write the tier manifest (tiers.json, see audio/tier_manifest.py) for songs ingested before
+manifests existed. Without one, listing a song's tiers falls back to scanning its folder.
+Files are hashed and measured once here; re-running rebuilds the manifest from scratch.
+
+Usage:
+    python scripts/build_tier_manifests.py --all
+    python scripts/build_tier_manifests.py --song Lit_MyOwnWorstEnemy
+"""
+
+import argparse
+import os
+import re
+import sys
+
+import soundfile as sf
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from audio.spectrum_store import load_spectrum, spectrum_path
+from audio.tier_manifest import file_digest, manifest_path, tier_entry, tier_key, update_manifest
+
+_TIER_FILE = re.compile(r'^reconstructed_audio_(\d+)\.(\w+)$')
+
+def build_manifest(song_folder):
+    """Rebuild song_folder's manifest from the files on disk; returns the number of tier files"""
+    entries = {}
+    sample_rate = duration = None
+    for name in sorted(os.listdir(song_folder)):
+        match = _TIER_FILE.match(name)
+        if not match:
+            continue
+        path = os.path.join(song_folder, name)
+        try:
+            info = sf.info(path)
+            sample_rate, duration = info.samplerate, info.duration
+        except RuntimeError:
+            pass  # e.g. Opus without libsndfile support; same length as the WAV of its tier
+        entries[tier_key(match.group(1), match.group(2))] = (path, duration)
+
+    fields = {}
+    stored = load_spectrum(song_folder)
+    if stored is not None:
+        fields = {'spectrum': file_digest(spectrum_path(song_folder)),
+                  'channels': 1 if stored.values.ndim == 1 else len(stored.values)}
+        sample_rate, duration = stored.sample_rate, stored.length / stored.sample_rate
+    if sample_rate is not None:
+        fields.update(sample_rate=sample_rate, duration=duration)
+
+    if os.path.exists(manifest_path(song_folder)):
+        os.remove(manifest_path(song_folder))
+    update_manifest(song_folder, tiers={key: tier_entry(path, file_duration or duration or 0)
+                                        for key, (path, file_duration) in entries.items()}, **fields)
+    return len(entries)
+
+def main():
+    parser = argparse.ArgumentParser(description='Write tier manifests for existing song folders')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--song', help='Song folder name (Song.base_filename)')
+    target.add_argument('--all', action='store_true', help='Every song folder under AUDIO_OUTPUT_FOLDER')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        output_root = app.config['AUDIO_OUTPUT_FOLDER']
+        if args.all:
+            songs = sorted(name for name in os.listdir(output_root)
+                           if os.path.isdir(os.path.join(output_root, name)))
+        else:
+            songs = [args.song]
+
+        print(f"Building manifests for {len(songs)} song(s)")
+        failures = 0
+        for song in songs:
+            try:
+                count = build_manifest(os.path.join(output_root, song))
+            except (OSError, ValueError) as e:
+                failures += 1
+                print(f"❌ {song}: {e}")
+                continue
+            print(f"✅ {song}: {count} tier files")
+
+        sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Background ingest worker
+Runs the YouTube download + DFT pipeline for songs queued from the admin panel
+(/admin/process_spotify_song), so web workers never block on processing.
+
+Usage:
+    python scripts/ingest_worker.py          # run forever, polling for jobs
+    python scripts/ingest_worker.py --once   # process everything queued, then exit
+"""
+
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.services.ingest_service import IngestService
+from datetime import datetime
+
+def _run_job(app, job_id):
+    """Run one job inside its own app context (and therefore its own DB session)"""
+    with app.app_context():
+        try:
+            success = IngestService.run(job_id)
+            job = IngestService.get_job(job_id)
+            icon = '✅' if success else '❌'
+            if job:
+                print(f"[{datetime.now()}] {icon} Job {job_id} {job.status}: {job.error or job.message}")
+        finally:
+            db.session.remove()
+
+def _fail_stale_jobs(app):
+    """Fail jobs whose worker died (see IngestService.fail_stale_jobs)"""
+    with app.app_context():
+        stale = IngestService.fail_stale_jobs()
+        db.session.remove()
+    if stale:
+        print(f"[{datetime.now()}] ⚠️  Marked {stale} stale running job(s) as failed")
+
+def main():
+    """Claim queued jobs and run them on a bounded pool"""
+    once = '--once' in sys.argv[1:]
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        max_workers = app.config['INGEST_WORKER_CONCURRENCY']
+        poll_interval = app.config['INGEST_POLL_INTERVAL']
+        stale_check_interval = app.config['INGEST_STALE_CHECK_INTERVAL']
+
+    print(f"[{datetime.now()}] Ingest worker started with {max_workers} slot(s)")
+
+    in_flight = set()
+    next_stale_check = 0.0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            while True:
+                in_flight = {f for f in in_flight if not f.done()}
+
+                # Not only at startup: a worker that crashes while this one runs leaves its jobs running
+                if time.monotonic() >= next_stale_check:
+                    _fail_stale_jobs(app)
+                    next_stale_check = time.monotonic() + stale_check_interval
+
+                # Only claim work when a slot is free, so queued jobs stay visible to other workers
+                claimed = None
+                if len(in_flight) < max_workers:
+                    with app.app_context():
+                        job = IngestService.claim_next()
+                        if job:
+                            claimed = job.id
+                            print(f"[{datetime.now()}] ▶️  Job {job.id}: {job.title} by {job.artist}")
+                        db.session.remove()
+
+                if claimed is not None:
+                    in_flight.add(pool.submit(_run_job, app, claimed))
+                    continue
+
+                if once and not in_flight:
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            print(f"[{datetime.now()}] Stopping; waiting for {len(in_flight)} running job(s)...")
+
+    print(f"[{datetime.now()}] Ingest worker stopped")
+
+if __name__ == '__main__':
+    main()
@@ -11,8 +11,53 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from sqlalchemy import inspect, text
+
 from app import create_app, db
-from app.models import User, Song, UserStats, SongStats, SongHistory, UserPlayerState
+from app.models import User, Song, UserStats, SongStats, SongHistory, UserPlayerState, IngestJob, CacheVersion, GameState
+
+def add_missing_columns():
+    """
+    Add columns that models gained since their table was created (create_all never alters tables)
+    Only nullable columns can be added to rows that already exist; others are reported
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added = 0
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            if not column.nullable:
+                print(f"⚠️  {table.name}.{column.name} is NOT NULL; add it by hand")
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            print(f"Added column {table.name}.{column.name} ({column_type})")
+            added += 1
+    db.session.commit()
+    return added
+
+def migrate_active_song_flag():
+    """
+    Point the game_state row at the song flagged by the old songs.is_active column, once
+    The column is left in place (unmapped); returns the song id carried over, or None
+    """
+    if GameState.current() is not None:
+        return None
+    columns = {column['name'] for column in inspect(db.engine).get_columns('songs')}
+    if 'is_active' not in columns:
+        return None
+    row = db.session.execute(text('SELECT id FROM songs WHERE is_active = :flag ORDER BY id LIMIT 1'),
+                             {'flag': True}).first()
+    if row is None:
+        return None
+    GameState.activate(row[0])
+    db.session.commit()
+    return row[0]
 
 def migrate_database():
     """Create all database tables"""
@@ -23,6 +68,14 @@ def migrate_database():
         db.create_all()
         print("Database tables created successfully!")
         
+        print("Checking for new columns...")
+        if not add_missing_columns():
+            print("All columns up to date.")
+        
+        song_id = migrate_active_song_flag()
+        if song_id is not None:
+            print(f"Active song {song_id} moved from songs.is_active to game_state")
+        
         # Check if admin user exists
         from app.models import AdminUser
         admin_user = AdminUser.query.filter_by(username='admin').first()
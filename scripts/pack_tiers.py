@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Pack each song's tier files into a single tiers.pack (see audio/tier_pack.py)
+The web app serves tiers from the pack when one exists; copying a song to another
+node is then a single file (plus spectrum.npz if it should stay re-tierable).
+
+Usage:
+    python scripts/pack_tiers.py --all
+    python scripts/pack_tiers.py --song Lit_MyOwnWorstEnemy
+    python scripts/pack_tiers.py --all --remove-files    # delete the loose tier files once packed
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from audio.tier_pack import PACK_FILENAME, TierPack, pack_path, write_pack
+
+def _remove_packed_files(song_folder, keys):
+    """Delete loose tier files, but only after checking the pack holds each one"""
+    pack = TierPack(pack_path(song_folder))
+    for key in keys:
+        level, fmt = key.split('.', 1)
+        path = os.path.join(song_folder, f'reconstructed_audio_{key}')
+        with open(path, 'rb') as f:
+            if f.read() != pack.get(level, fmt):
+                raise ValueError(f"{path} does not match its packed copy; not removing")
+        os.remove(path)
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack tier files into one memory-mappable file per song')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--song', help='Song folder name (Song.base_filename)')
+    target.add_argument('--all', action='store_true', help='Every song folder under AUDIO_OUTPUT_FOLDER')
+    parser.add_argument('--remove-files', action='store_true', help='Delete loose tier files after packing')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        output_root = app.config['AUDIO_OUTPUT_FOLDER']
+        if args.all:
+            songs = sorted(name for name in os.listdir(output_root)
+                           if os.path.isdir(os.path.join(output_root, name)))
+        else:
+            songs = [args.song]
+
+        print(f"Packing {len(songs)} song(s)")
+        failures = 0
+        for song in songs:
+            song_folder = os.path.join(output_root, song)
+            start = time.perf_counter()
+            try:
+                keys = write_pack(song_folder)
+                if keys and args.remove_files:
+                    _remove_packed_files(song_folder, keys)
+            except (OSError, ValueError) as e:
+                failures += 1
+                print(f"❌ {song}: {e}")
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            if not keys:
+                print(f"⚠️  {song}: no tier files to pack")
+                continue
+            size_mb = os.path.getsize(os.path.join(song_folder, PACK_FILENAME)) / (1024 * 1024)
+            print(f"✅ {song}: {len(keys)} files, {size_mb:.1f} MB in {elapsed:.0f} ms")
+
+        sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
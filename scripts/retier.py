@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Re-render frequency tiers from each song's stored spectrum (spectrum.npz)
+No download or decode is needed, so this takes milliseconds per song.
+
+Usage:
+    python scripts/retier.py --all
+    python scripts/retier.py --song Lit_MyOwnWorstEnemy --levels 250,500,1000,2000,4000,7500
+    python scripts/retier.py --all --prune    # also delete tier files not in the level set
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.services.audio_service import AudioService
+from audio.encode import AUDIO_FORMATS
+from audio.spectrum_store import SPECTRUM_FILENAME
+from audio.tier_manifest import update_manifest
+
+def _prune_tiers(song_folder, levels):
+    """Delete reconstructed_audio_<N>.<ext> files (any tier format) whose level is not in levels"""
+    keep = {f'reconstructed_audio_{level}.{fmt}' for level in levels for fmt in AUDIO_FORMATS}
+    removed = []
+    for name in os.listdir(song_folder):
+        if (name.startswith('reconstructed_audio_') and name.rsplit('.', 1)[-1] in AUDIO_FORMATS
+                and name not in keep):
+            os.remove(os.path.join(song_folder, name))
+            removed.append(name[len('reconstructed_audio_'):])
+    update_manifest(song_folder, remove_tiers=removed)
+    AudioService.refresh_pack(song_folder)
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-render frequency tiers from stored spectra')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--song', help='Song folder name (Song.base_filename)')
+    target.add_argument('--all', action='store_true', help='Every song folder with a stored spectrum')
+    parser.add_argument('--levels', help='Comma-separated tier sizes (default: FREQUENCY_LEVELS)')
+    parser.add_argument('--prune', action='store_true', help='Delete tier files not in the level set')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        output_root = app.config['AUDIO_OUTPUT_FOLDER']
+        levels = ([int(level) for level in args.levels.split(',')] if args.levels
+                  else list(app.config['FREQUENCY_LEVELS']))
+
+        if args.all:
+            songs = sorted(
+                name for name in os.listdir(output_root)
+                if os.path.exists(os.path.join(output_root, name, SPECTRUM_FILENAME))
+            )
+        else:
+            songs = [args.song]
+
+        print(f"Re-tiering {len(songs)} song(s) to levels {levels}")
+        failures = 0
+        for song in songs:
+            start = time.perf_counter()
+            written = AudioService.retier(song, levels)
+            elapsed = (time.perf_counter() - start) * 1000
+            if written is None:
+                failures += 1
+                print(f"❌ {song}: no {SPECTRUM_FILENAME} (re-ingest the song to create one)")
+                continue
+            if args.prune:
+                _prune_tiers(os.path.join(output_root, song), written)
+            print(f"✅ {song}: {len(written)} tiers in {elapsed:.0f} ms")
+
+        sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()